@@ -0,0 +1,79 @@
+"""
+Peak memory of a re-encoded merge versus clip count.
+
+Generates short synthetic clips with lavfi, merges them with processing_logic.merge_videos
+once with all inputs in one ffmpeg process and once in bounded groups, and prints the peak
+RSS of the ffmpeg children for each clip count. Unix only (uses getrusage).
+
+    python bench_merge.py                # 8 16 32 64 128 clips
+    python bench_merge.py 50 100 200
+"""
+import os
+import sys
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import processing_logic as logic
+
+DEFAULT_COUNTS = [8, 16, 32, 64, 128]
+CLIP_SECONDS = 2
+
+def make_clips(directory, count):
+    """Create `count` tiny clips (reused across runs in the same directory)."""
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"clip_{i:04d}.mp4")
+        if not os.path.exists(path):
+            subprocess.run([
+                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                '-f', 'lavfi', '-i', f"testsrc=size=640x360:rate=30:duration={CLIP_SECONDS}",
+                '-f', 'lavfi', '-i', f"sine=frequency={200 + i}:duration={CLIP_SECONDS}",
+                '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-shortest', path
+            ], check=True)
+        paths.append(path)
+    return paths
+
+def run_one(directory, count, group_size):
+    """Child mode: merge once and print the peak RSS (KiB) of the ffmpeg processes."""
+    paths = make_clips(directory, count)
+    out = os.path.join(directory, f"merged_{count}_{group_size}.mp4")
+    start = time.time()
+    ok, _ = logic.merge_videos(paths, out, log_func=lambda *a, **k: None, use_gpu=False,
+                               stream_copy=False, group_size=group_size or None)
+    elapsed = time.time() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kib //= 1024  # macOS reports bytes
+    print(f"{int(ok)} {peak_kib} {elapsed:.2f}")
+
+def measure(directory, count, group_size):
+    # A fresh interpreter per run, since RUSAGE_CHILDREN keeps the max over every child ever waited for
+    result = subprocess.run([sys.executable, __file__, "--run", directory, str(count), str(group_size)],
+                            capture_output=True, text=True)
+    ok, peak_kib, elapsed = result.stdout.split()[-3:]
+    return ok == "1", int(peak_kib) / 1024, float(elapsed)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    counts = [int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS
+    directory = tempfile.mkdtemp(prefix="bench_merge_")
+    try:
+        make_clips(directory, max(counts))
+        print(f"{'clips':>6} | {'flat RSS':>10} {'time':>7} | {'grouped RSS':>12} {'time':>7}")
+        for count in counts:
+            flat_ok, flat_mb, flat_t = measure(directory, count, 0)
+            group_ok, group_mb, group_t = measure(directory, count, logic.MERGE_GROUP_SIZE)
+            flat = f"{flat_mb:8.1f}MB" if flat_ok else "    failed"
+            grouped = f"{group_mb:10.1f}MB" if group_ok else "      failed"
+            print(f"{count:>6} | {flat} {flat_t:6.1f}s | {grouped} {group_t:6.1f}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,9 @@ from playsound import playsound
 import httpx
 import platform
 import urllib.parse
+import logging
+from logging.handlers import RotatingFileHandler
+from collections import deque
 
 APP_VERSION = "Dev Build"
 
@@ -178,6 +181,171 @@ class UpdateManager:
             subprocess.Popen(["/bin/bash", sh_path])
             sys.exit(0)
 
+class UIPump:
+    """
+    Coalesces progress updates from worker threads and flushes them in one page.update().
+    Workers submit an `apply` callable per key (one key per progress display); only the
+    newest one per key survives until the next tick, so the UI refreshes at a fixed rate
+    no matter how often ffmpeg reports.
+    """
+    def __init__(self, page: ft.Page, hz=10):
+        self.page = page
+        self.interval = 1.0 / max(5, min(hz, 15))  # Fast enough to feel live, slow enough to stay cheap
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush, so cancel() can wait out a batch that was already taken.
+        # Re-entrant: an apply or ticker may itself cancel a key.
+        self._flush_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._tickers = []
+        self.submitted = 0
+        self.coalesced = 0  # Replaced by a newer update before a flush
+        self.dropped = 0  # Discarded without being applied (cancelled, failed, or pump stopped)
+        self.flushes = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            self.dropped += len(self._pending)
+            self._pending.clear()
+
+    def submit(self, key, apply):
+        with self._lock:
+            self.submitted += 1
+            if self._stop.is_set():
+                self.dropped += 1
+                return
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = apply
+
+    def add_ticker(self, tick):
+        """Run `tick()` on every flush; it returns True when it changed controls."""
+        self._tickers.append(tick)
+
+    def cancel(self, key):
+        """
+        Forget a pending update, e.g. before writing a final state that it must not overwrite.
+        Also waits for a flush in progress, which may hold an update taken before the cancel.
+        """
+        with self._lock:
+            if self._pending.pop(key, None) is not None:
+                self.dropped += 1
+        with self._flush_lock:
+            pass
+
+    def flush(self):
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        changed = False
+        for tick in self._tickers:
+            try: changed = tick() or changed
+            except: pass
+        if not batch and not changed:
+            return
+        failed = 0
+        for apply in batch.values():
+            try: apply()
+            except: failed += 1
+        if failed:
+            with self._lock:
+                self.dropped += failed
+        try:
+            self.page.update()
+            self.flushes += 1
+        except: pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {"submitted": self.submitted, "coalesced": self.coalesced,
+                    "dropped": self.dropped, "flushes": self.flushes, "pending": len(self._pending)}
+
+LOG_STORE_LINES = 1000  # Lines kept in memory per tab (error reports, re-rendering the view)
+LOG_VIEW_WINDOW = 100  # Newest lines materialised as controls in a tab's log view
+LOG_FILE_MAX_BYTES = 2 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+class LogStore:
+    """
+    Per-tab ring buffers of log lines. Writers only append (any thread); the UI drains the
+    dirty tabs in batches. Every finished line also goes to a rotating log file, so the
+    full history survives even though memory and the view are bounded.
+    """
+    def __init__(self, log_path, maxlen=LOG_STORE_LINES):
+        self.log_path = log_path
+        self.maxlen = maxlen
+        self._lines = {}
+        self._counts = {}  # Lines ever appended per tab, so views know how far behind they are
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._file_log = logging.getLogger("video-utilities")
+        self._file_log.propagate = False
+        self._file_log.setLevel(logging.INFO)
+        if not self._file_log.handlers:
+            try:
+                handler = RotatingFileHandler(log_path, maxBytes=LOG_FILE_MAX_BYTES,
+                                              backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self._file_log.addHandler(handler)
+            except OSError as e:
+                print(f"⚠️ Log file unavailable: {e}")
+
+    def append(self, tab, message, replace_last=False):
+        msg = str(message).strip()
+        if not msg: return
+        with self._lock:
+            buf = self._lines.get(tab)
+            if buf is None:
+                buf = self._lines[tab] = deque(maxlen=self.maxlen)
+                self._counts[tab] = 0
+            if replace_last and buf:
+                buf[-1] = msg
+            else:
+                buf.append(msg)
+                self._counts[tab] += 1
+            self._dirty.add(tab)
+        # In-place progress lines are transient; only finished lines go to disk
+        if not replace_last:
+            self._file_log.info(f"[{tab}] {msg}")
+
+    def recent(self, tab, n):
+        with self._lock:
+            buf = self._lines.get(tab)
+            if not buf: return []
+            return list(buf)[-n:]
+
+    def snapshot(self, tab, n):
+        """(newest `n` lines, total lines ever appended) for rendering a view."""
+        with self._lock:
+            buf = self._lines.get(tab)
+            if not buf: return [], 0
+            return list(buf)[-n:], self._counts[tab]
+
+    def take_dirty(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def mark_dirty(self, tabs):
+        with self._lock:
+            self._dirty.update(tabs)
+
 # --- Settings Management ---
 if os.name == 'nt':
     CONFIG_DIR = os.path.join(os.environ.get('LOCALAPPDATA', ''), 'video-utilities')
@@ -186,6 +354,7 @@ else:
 
 os.makedirs(CONFIG_DIR, exist_ok=True)
 SETTINGS_FILE = os.path.join(CONFIG_DIR, 'preferences.json')
+LOG_FILE = os.path.join(CONFIG_DIR, 'video-utilities.log')
 
 DEFAULT_SETTINGS = {
     "theme_mode": "dark",
@@ -199,7 +368,20 @@ DEFAULT_SETTINGS = {
     "comic_sans_active": False,
     "transparent_app": True,
     "custom_font_path": "",
-    "custom_font_family": ""
+    "custom_font_family": "",
+    "max_parallel_jobs": 0,  # 0 = pick automatically from the CPU count
+    "gpu_slots": logic.DEFAULT_GPU_SLOTS,  # Concurrent hardware encodes in a batch
+    "merge_target": "majority",  # Key of MERGE_TARGET_CHOICES
+    "frame_accurate_cuts": True  # Trimmer/silence cuts re-encode the boundary GOPs
+}
+
+# Merger output canvas choices: key -> (label, processing_logic policy, explicit target)
+MERGE_TARGET_CHOICES = {
+    "majority": ("Match most clips", "majority", None),
+    "largest": ("Largest clip", "largest", None),
+    "2160p": ("4K (2160p)", "majority", {"width": 3840, "height": 2160}),
+    "1080p": ("1080p", "majority", {"width": 1920, "height": 1080}),
+    "720p": ("720p", "majority", {"width": 1280, "height": 720}),
 }
 
 def get_system_fonts():
@@ -323,6 +505,14 @@ def open_folder(path):
         else: subprocess.Popen(['xdg-open', folder])
     except: pass
 
+def open_file(path):
+    try:
+        if not path or not os.path.exists(path): return
+        if os.name == 'nt': os.startfile(path)
+        elif sys.platform == 'darwin': subprocess.Popen(['open', path])
+        else: subprocess.Popen(['xdg-open', path])
+    except: pass
+
 # Logic to prevent console windows from popping up on Windows
 SUBPROCESS_FLAGS = 0
 if os.name == 'nt':
@@ -620,6 +810,9 @@ async def main(page: ft.Page):
         # Wait until it's installed (modal closed)
         # Note: We can't block easily here without blocking the whole UI setup, 
         # so we let the UI load behind it but disabled (modal=True does the trick visually)
+    else:
+        # Warm the encoder/hardware registry off the UI thread
+        threading.Thread(target=logic.get_capabilities, daemon=True).start()
 
     # --- Konami Code Secret ---
     konami_sequence = ["Arrow Up", "Arrow Up", "Arrow Down", "Arrow Down", "Arrow Left", "Arrow Right", "Arrow Left", "Arrow Right", "A", "B"]
@@ -770,8 +963,12 @@ async def main(page: ft.Page):
     fps_custom_row = ft.Ref[ft.Row]()
     fps_custom_input = ft.Ref[ft.TextField]()
 
-    # Custom progress bar helper
-    def update_progress_bar(pct):
+    # Progress from worker threads is applied through the pump, one batched page.update() per tick
+    ui_pump = UIPump(page, hz=10)
+    ui_pump.start()
+
+    # Custom progress bar helper (push=False leaves the page.update() to the caller)
+    def update_progress_bar(pct, push=True):
         if not progress_fill.current or not page.window.width: return
         
         prev_w = preview_container.current.width if preview_container.current and preview_container.current.width else 0
@@ -785,10 +982,10 @@ async def main(page: ft.Page):
         if bar_max_w < 0: bar_max_w = 0
         
         progress_fill.current.width = bar_max_w * pct
-        progress_fill.current.update()
+        if push: progress_fill.current.update()
 
 
-    def update_conv_progress_bar(pct):
+    def update_conv_progress_bar(pct, push=True):
         if not conv_progress_fill.current or not page.window.width: return
         prev_w = conv_preview_container.current.width if conv_preview_container.current and conv_preview_container.current.width else 0
         available_w = page.window.width - 40
@@ -796,15 +993,9 @@ async def main(page: ft.Page):
         bar_max_w = available_w - 30
         if bar_max_w < 0: bar_max_w = 0
         conv_progress_fill.current.width = bar_max_w * pct
-        conv_progress_fill.current.update()
-            
-        bar_max_w = available_w - 30
-        if bar_max_w < 0: bar_max_w = 0
-        
-        conv_progress_fill.current.width = bar_max_w * pct
-        conv_progress_fill.current.update()
+        if push: conv_progress_fill.current.update()
 
-    def update_merger_progress_bar(pct):
+    def update_merger_progress_bar(pct, push=True):
         if not merger_progress_fill.current or not page.window.width: return
         prev_w = 400 # Fixed width for merger preview side
         available_w = page.window.width - 40
@@ -812,7 +1003,7 @@ async def main(page: ft.Page):
         bar_max_w = available_w - 30
         if bar_max_w < 0: bar_max_w = 0
         merger_progress_fill.current.width = bar_max_w * pct
-        merger_progress_fill.current.update()
+        if push: merger_progress_fill.current.update()
 
 
     keyframe_input = ft.Ref[ft.TextField]()
@@ -840,6 +1031,7 @@ async def main(page: ft.Page):
     merger_placeholder_img = ft.Ref[ft.Image]()
     merger_preview_container = ft.Ref[ft.Container]()
     merger_output_field = ft.Ref[ft.TextField]()
+    merger_append_switch = ft.Ref[ft.Switch]()
     merger_video_player = ft.Ref()
     merger_status_text = ft.Ref[ft.Text]()
     merger_progress_fill = ft.Ref[ft.Container]()
@@ -854,139 +1046,116 @@ async def main(page: ft.Page):
     
     selected_file_paths = []  # List of input file paths for batch processing
     target_output_path = None  # Can be a folder (for batch) or file (for single)
-    preview_file_path = os.path.join(temp_dir, "preview_frame.jpg")
+    preview_frames = logic.PreviewFrames()  # Filled by the first job's encode over a pipe
     stop_event = threading.Event()
     is_compressing = False
     easter_egg_clicks = 0
     obscure_revealed = False
     all_codecs_revealed = False
     
-    # Global log buffer for error reporting (last 50 lines per tab)
-    tab_logs = {"compressor": [], "converter": [], "merger": [], "trimmer": [], "general": []}
+    # Log lines land in a bounded per-tab store and are drawn by the UI pump in batches
+    log_store = LogStore(LOG_FILE)
     
     last_set_by_slider = 0.0
     is_updating_ui = False
 
-    async def log_to_view(list_ref, message, replace_last=False):
-        # Clean message
-        msg = str(message).strip()
-        if not msg: return
-        
-        # Always record in buffer for error recovery
-        nonlocal current_tab
-        tab = "general"
-        if list_ref == compressor_log_list: tab = "compressor"
-        elif list_ref == converter_log_list: tab = "converter"
-        elif list_ref == merger_log_list: tab = "merger"
-        elif list_ref == trimmer_log_list: tab = "trimmer"
-        
-        if replace_last and tab_logs[tab]:
-            tab_logs[tab][-1] = msg
-        else:
-            tab_logs[tab].append(msg)
-            if len(tab_logs[tab]) > 50:
-                tab_logs[tab].pop(0)
-
-        # Update visual list ONLY if user has show_logs enabled
-        if not user_settings.get("show_logs", False) or not list_ref.current:
-            return
-        
-        while len(list_ref.current.controls) > 200:
-            list_ref.current.controls.pop(0)
-
-        if replace_last and len(list_ref.current.controls) > 0:
-            list_ref.current.controls[-1].value = msg
-        else:
-            list_ref.current.controls.append(
-                ft.Text(msg, size=11, font_family="monospace", color=ft.Colors.ON_SURFACE_VARIANT)
-            )
-                
-        list_ref.current.update()
+    def log_tab_for(list_ref):
+        if list_ref == compressor_log_list: return "compressor"
+        elif list_ref == converter_log_list: return "converter"
+        elif list_ref == merger_log_list: return "merger"
+        elif list_ref == trimmer_log_list: return "trimmer"
+        elif list_ref == audio_log_list: return "audio"
+        return "general"
+
+    def log_to_view(list_ref, message, replace_last=False):
+        # Safe from any thread: only records the line, render_logs draws it on the next tick
+        log_store.append(log_tab_for(list_ref), message, replace_last)
+
+    rendered_log_counts = {}  # tab -> lines appended when its view was last drawn
+
+    def render_logs():
+        """Bring dirty log views up to date. Runs on UI pump ticks, returns True if anything changed."""
+        dirty = log_store.take_dirty()
+        # Hidden views are caught up in full when logs get switched back on
+        if not dirty or not user_settings.get("show_logs", False):
+            return False
+        changed = False
+        for tab in dirty:
+            list_ref = log_views.get(tab)
+            if not list_ref or not list_ref.current: continue
+            lines, count = log_store.snapshot(tab, LOG_VIEW_WINDOW)
+            controls = list_ref.current.controls
+            new = count - rendered_log_counts.get(tab, 0)
+            if new >= LOG_VIEW_WINDOW or new < 0 or len(controls) > LOG_VIEW_WINDOW:
+                # Too far behind to patch: rebuild the window from the store
+                controls.clear()
+                new = len(lines)
+            # The newest drawn line may have been rewritten in place since (progress lines)
+            if controls and len(lines) > new:
+                controls[-1].value = lines[-new - 1]
+            for msg in lines[len(lines) - new:]:
+                controls.append(ft.Text(msg, size=11, font_family="monospace", color=ft.Colors.ON_SURFACE_VARIANT))
+            if len(controls) > LOG_VIEW_WINDOW:
+                del controls[:len(controls) - LOG_VIEW_WINDOW]
+            rendered_log_counts[tab] = count
+            changed = True
+        return changed
 
     def log(message, replace_last=False):
         # We'll use this for status updates or fallback logging
-        print(message)
         nonlocal current_tab
         target_list = compressor_log_list
         if current_tab == "converter": target_list = converter_log_list
         elif current_tab == "merger": target_list = merger_log_list
         elif current_tab == "trimmer": target_list = trimmer_log_list
         
-        page.run_task(log_to_view, target_list, message, replace_last)
+        log_to_view(target_list, message, replace_last)
 
     def on_progress(data):
-        if res_text.current: res_text.current.value = f"{data['res']}p"
-        if rem_time_text.current: rem_time_text.current.value = data['rem_time']
-        if fps_text.current: fps_text.current.value = f"{data['fps']} fps"
-        if pct_text.current: pct_text.current.value = f"{int(data['pct'] * 100)}%"
-        
-        # Update Custom Progress Bar
-        update_progress_bar(data['pct'])
+        def apply():
+            if res_text.current: res_text.current.value = f"{data['res']}p"
+            if rem_time_text.current: rem_time_text.current.value = data['rem_time']
+            if fps_text.current: fps_text.current.value = f"{data['fps']} fps"
+            if pct_text.current: pct_text.current.value = f"{int(data['pct'] * 100)}%"
+            
+            # Update Custom Progress Bar
+            update_progress_bar(data['pct'], push=False)
         
-        page.update()
+        ui_pump.submit("compress", apply)
 
     def update_preview_loop():
-        # Force cleanup of old preview file
-        if os.path.exists(preview_file_path):
-            try: os.remove(preview_file_path)
-            except: pass
-            
-        # Small delay to allow ffmpeg to write first frame
-        time.sleep(2)  # Increased delay to give ffmpeg more time
-        log(f"🔍 Preview loop started. Looking for: {preview_file_path}")
+        preview_frames.reset()
+        log("🔍 Preview loop started.")
         
-        last_modified = 0  # Track when file was last modified
+        last_seq = 0
         first_frame_shown = False
         
         while is_compressing:
-            if preview_switch.current.value:
-                if os.path.exists(preview_file_path):
-                    try:
-                        # Check if file has been modified since last check
-                        current_modified = os.path.getmtime(preview_file_path)
-                        
-                        if current_modified > last_modified:
-                            last_modified = current_modified
-                            
-                            # Clear file handle quickly
-                            with open(preview_file_path, "rb") as f:
-                                img_bytes = f.read()
-                            
-                            if len(img_bytes) > 1000: # Ensure we didn't catch a tiny/partial file
-                                encoded = base64.b64encode(img_bytes).decode("utf-8")
-                                # Use data URI format with src instead of src_base64
-                                preview_image.current.src = f"data:image/jpeg;base64,{encoded}"
-                                
-                                # Detect image dimensions and update container width
-                                try:
-                                    from PIL import Image
-                                    import io
-                                    img = Image.open(io.BytesIO(img_bytes))
-                                    img_width = img.width
-                                    # Add padding for container (30 total for padding)
-                                    preview_container.current.width = img_width + 30
-                                except:
-                                    pass
-                                
-                                # Smooth transition from placeholder to frames (only on first NEW frame)
-                                if not first_frame_shown:
-                                    first_frame_shown = True
-                                    preview_image.current.opacity = 1
-                                    placeholder_img_control.current.opacity = 0
-                                    placeholder_img_control.current.update()
-                                    log("✅ Preview image displayed!")
-                                
-                                preview_image.current.update()
-                                preview_container.current.update()
-                                page.update()  # Force UI refresh
-                            else:
-                                log(f"⚠️ Preview file too small: {len(img_bytes)} bytes")
-                    except Exception as e:
-                        log(f"⚠️ Preview read error: {e}")
-                else:
-                    # Only log this once per second to avoid spam
-                    pass
-            time.sleep(1)
+            # Wakes as soon as ffmpeg finishes a frame; the timeout only re-checks is_compressing
+            frame = preview_frames.wait_for(last_seq, timeout=1.0)
+            if frame is None or not preview_switch.current.value:
+                continue
+            last_seq = frame.seq
+            try:
+                encoded = base64.b64encode(frame.data).decode("utf-8")
+                # Use data URI format with src instead of src_base64
+                preview_image.current.src = f"data:image/jpeg;base64,{encoded}"
+                # Add padding for container (30 total for padding)
+                preview_container.current.width = frame.width + 30
+                
+                # Smooth transition from placeholder to frames (only on first NEW frame)
+                if not first_frame_shown:
+                    first_frame_shown = True
+                    preview_image.current.opacity = 1
+                    placeholder_img_control.current.opacity = 0
+                    placeholder_img_control.current.update()
+                    log("✅ Preview image displayed!")
+                
+                preview_image.current.update()
+                preview_container.current.update()
+                page.update()  # Force UI refresh
+            except Exception as e:
+                log(f"⚠️ Preview update error: {e}")
 
     def on_preview_toggle(e):
         if e.control.value:
@@ -1144,16 +1313,9 @@ async def main(page: ft.Page):
         except: return None
 
     def generate_thumbnail(input_path):
+        # Cached per file version, so refreshing the preview doesn't re-run ffmpeg
         try:
-            outfile = os.path.join(temp_dir, "thumbnail_temp.jpg")
-            cmd = [
-                "ffmpeg", "-y", "-i", input_path,
-                "-ss", "00:00:01",
-                "-vframes", "1",
-                outfile
-            ]
-            subprocess.run(cmd, capture_output=True, creationflags=SUBPROCESS_FLAGS)
-            return outfile
+            return logic.request_thumbnail(input_path, width=640).result()
         except: return None
 
     def update_converter_preview():
@@ -1931,9 +2093,9 @@ async def main(page: ft.Page):
         
         # Try to pickup recent logs if detailed_log is empty
         if not detailed_log:
-            tab = current_tab if current_tab in tab_logs else "general"
-            if tab_logs[tab]:
-                detailed_log = "--- RECENT LOGS ---\n" + "\n".join(tab_logs[tab][-20:])
+            recent = log_store.recent(current_tab, 20) or log_store.recent("general", 20)
+            if recent:
+                detailed_log = "--- RECENT LOGS ---\n" + "\n".join(recent)
         
         if error_title_text.current:
             error_title_text.current.value = title
@@ -2051,11 +2213,11 @@ async def main(page: ft.Page):
             total_files = len(selected_file_paths)
             successful_count = 0
             size_warn_shown = False
+            finished_count = 0
             
+            max_jobs = user_settings.get("max_parallel_jobs", 0) or None
+            jobs = []
             for idx, input_file in enumerate(selected_file_paths):
-                if stop_event.is_set():
-                    break
-                    
                 # Determine output path for this file
                 if total_files == 1:
                     output_file = target_output_path
@@ -2071,40 +2233,59 @@ async def main(page: ft.Page):
                     
                     output_file = os.path.join(output_folder, f"{name}_compressed{ext}")
                 
-                btn_text.current.value = f"Compressing... ({idx + 1}/{total_files})"
-                page.update()
-                
-                log(f"\n📹 Processing: {os.path.basename(input_file)}")
-                
-                success, final_output, result_size = logic.auto_compress(
-                    input_file, 
-                    target_mb, 
-                    codec, 
-                    use_gpu, 
+                jobs.append(logic.CompressionJob(
+                    input_file,
+                    target_mb,
+                    codec,
+                    use_gpu,
                     output_file=output_file,
-                    log_func=log,
-                    stop_event=stop_event,
-                    preview_path=preview_file_path if show_preview else None,
-                    progress_callback=on_progress,
                     advanced_params=adv_params,
-                    res_params=res_params
-                )
-                
-                if success:
+                    res_params=res_params,
+                    # Only one preview pane, so only the first job feeds it
+                    preview=preview_frames if (show_preview and idx == 0) else None
+                ))
+            
+            def on_job_progress(job, data):
+                if total_files > 1:
+                    data = dict(data, pct=scheduler.overall_progress())
+                on_progress(data)
+            
+            results_lock = threading.Lock()
+            
+            def on_job_done(job):
+                with results_lock:
+                    record_job_result(job)
+            
+            def record_job_result(job):
+                nonlocal successful_count, size_warn_shown, finished_count
+                finished_count += 1
+                if job.status == "done":
                     successful_count += 1
-                    log(f"✅ Saved: {os.path.basename(final_output)}")
-                elif result_size is not None:
+                    log(f"✅ Saved: {os.path.basename(job.output_file)}")
+                elif job.status == "too_big":
                     # Encoding succeeded but file was still too big
-                    log(f"⚠️ Too big: {os.path.basename(input_file)} ({result_size:.2f} MB > {target_mb:.2f} MB)")
-                    show_size_warning(target_mb, result_size)
+                    log(f"⚠️ Too big: {job.name} ({job.result_size:.2f} MB > {target_mb:.2f} MB)")
+                    show_size_warning(target_mb, job.result_size)
                     size_warn_shown = True
-                else:
-                    log(f"❌ Failed: {os.path.basename(input_file)}")
-                
-                # Update files processed counter removed per request
-                pass
+                elif job.status == "failed":
+                    log(f"❌ Failed: {job.name}")
+                btn_text.current.value = f"Compressing... ({finished_count}/{total_files})"
+                page.update()
             
-            # Final status
+            scheduler = logic.JobScheduler(
+                cpu_slots=max_jobs,
+                gpu_slots=user_settings.get("gpu_slots", logic.DEFAULT_GPU_SLOTS),
+                log_func=log,
+                on_progress=on_job_progress,
+                on_job_done=on_job_done,
+                stop_event=stop_event
+            )
+            scheduler.run(jobs)
+            if total_files > 1:
+                scheduler.log_stats()
+            
+            # Final status (a stale pending tick must not overwrite it)
+            ui_pump.cancel("compress")
             update_progress_bar(1.0)
             if pct_text.current: pct_text.current.value = "100%"
             page.update()
@@ -2773,17 +2954,7 @@ async def main(page: ft.Page):
         
         if fmt == "gif" or fmt == "webp":
             # Detect source FPS
-            input_fps = 30 # fallback
-            try:
-                fps_cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=r_frame_rate", "-of", "default=noprint_wrappers=1:nokey=1", input_path]
-                fps_res = subprocess.run(fps_cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
-                fps_str = fps_res.stdout.strip()
-                if "/" in fps_str:
-                    n, d = map(float, fps_str.split("/"))
-                    input_fps = n / d if d != 0 else 30
-                else:
-                    input_fps = float(fps_str)
-            except: pass
+            input_fps = logic.get_video_fps(input_path, default=30)
             
             if fmt == "gif":
                 # Cap at 50fps: high-FPS GIFs (like 60) often trigger "slow motion" fallback in browsers (delay 1 -> 10)
@@ -2818,46 +2989,34 @@ async def main(page: ft.Page):
                  log(f"\n🚀 CONVERTING: {os.path.basename(input_path)}")
                  # Ensure all cmd parts are strings
                  safe_cmd = [str(x) for x in cmd if x is not None]
-                 process = subprocess.Popen(safe_cmd, stderr=subprocess.PIPE, universal_newlines=True, creationflags=SUBPROCESS_FLAGS)
+                 # Get total duration (shared, cached probe)
+                 total_duration = logic.get_video_duration(input_path, log_func=None) or 0
                  
-                 # Get total duration
-                 total_duration = 0
-                 try:
-                     dur_cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", input_path]
-                     dur_res = subprocess.run(dur_cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
-                     total_duration = float(dur_res.stdout.strip())
-                 except: pass
+                 log_to_view(converter_log_list, "⏳ Starting...")
+
+                 def on_conv_progress(prog):
+                     # Live ffmpeg status, rewritten in place like the compressor's progress line
+                     m, s = divmod(int(prog.secs), 60)
+                     log_to_view(converter_log_list, f"⏳ frame={prog.frame} fps={prog.fps:.1f} time={m // 60:02d}:{m % 60:02d}:{s:02d} "
+                                                     f"size={prog.total_size / 1048576:.1f}MB speed={prog.speed:.2f}x", replace_last=True)
+                     if total_duration <= 0: return
+                     current_seconds = prog.secs
+                     pct = min(current_seconds / total_duration, 1.0)
+                     rem_time = (total_duration - current_seconds) / prog.speed if prog.speed > 0 else 0
+                     
+                     def apply():
+                         if conv_pct_text.current: conv_pct_text.current.value = f"{int(pct*100)}%"
+                         update_conv_progress_bar(pct, push=False)
+                         if conv_time_text.current: conv_time_text.current.value = f"{int(rem_time)}s"
+                         if conv_fps_text.current: conv_fps_text.current.value = f"{prog.speed:.1f}x"
+                     
+                     ui_pump.submit("convert", apply)
                  
-                 import re
-                 start_time = time.time()
-                 lines = []
-                 while True:
-                     line = process.stderr.readline()
-                     if not line and process.poll() is not None: break
-                     if line:
-                         page.run_task(log_to_view, converter_log_list, line)
-                         lines.append(line)
-                         time_match = re.search(r"time=(\d{2}:\d{2}:\d{2}\.\d{2})", line)
-                         if time_match and total_duration > 0:
-                             t_str = time_match.group(1)
-                             h, m, s = map(float, t_str.split(':'))
-                             current_seconds = h*3600 + m*60 + s
-                             pct = min(current_seconds / total_duration, 1.0)
-                             
-                             elapsed = time.time() - start_time
-                             speed = current_seconds / elapsed if elapsed > 0 else 0
-                             rem_time = (total_duration - current_seconds) / speed if speed > 0 else 0
-                             
-                             if conv_pct_text.current: conv_pct_text.current.value = f"{int(pct*100)}%"
-                             update_conv_progress_bar(pct)
-                             if conv_time_text.current: conv_time_text.current.value = f"{int(rem_time)}s"
-                             if conv_fps_text.current: conv_fps_text.current.value = f"{speed:.1f}x"
-                             
-                             conv_pct_text.current.update()
-                             conv_time_text.current.update()
-                             conv_fps_text.current.update()
-
-                 return_code = process.poll()
+                 return_code, lines = logic.run_ffmpeg(safe_cmd, on_conv_progress)
+                 ui_pump.cancel("convert")
+                 for line in lines:
+                     log_to_view(converter_log_list, line)
+
                  if return_code == 0:
                      update_conv_progress_bar(1.0)
                      if conv_pct_text.current: conv_pct_text.current.value = "100%"; conv_pct_text.current.update()
@@ -2869,7 +3028,8 @@ async def main(page: ft.Page):
                          if user_settings.get("auto_open_folder") and conv_target_path:
                              open_folder(conv_target_path)
                  else:
-                     log(f"❌ FFmpeg Error: {''.join(lines[-5:])}")
+                     err_tail = "\n".join(lines[-5:])
+                     log(f"❌ FFmpeg Error: {err_tail}")
                      if conv_status_text.current:
                          conv_status_text.current.value = "Error!"
                          conv_status_overlay.current.opacity = 1
@@ -3136,6 +3296,7 @@ async def main(page: ft.Page):
     
     # Trim segments data structure: list of dicts with start, end
     trim_segments = []
+    trim_edl = logic.EditDecisionList()  # Parsed from trim_segments on every rebuild
     trim_segments_list = ft.Ref[ft.Column]()
     trim_preview_container = ft.Ref[ft.Container]()
     trim_player_container = ft.Ref[ft.Container]()
@@ -3229,6 +3390,11 @@ async def main(page: ft.Page):
                         pos = res
                     
                     sec = duration_to_sec(pos)
+                    if not user_settings.get("frame_accurate_cuts", True) and trim_file_paths:
+                        # Keyframe cuts land on a keyframe anyway, so show where it will really be.
+                        # The index may still be scanning for a long file, so wait for it off the UI loop.
+                        keyframes = await asyncio.to_thread(logic.get_keyframe_index, trim_file_paths[0])
+                        sec = keyframes.nearest(sec)
                     trim_segments[seg_idx][field_name] = format_time(sec)
                     rebuild_segments_list()
                     check_and_generate_preview()
@@ -3272,8 +3438,20 @@ async def main(page: ft.Page):
             animate=ft.Animation(300, ft.AnimationCurve.EASE_OUT)
         )
 
+    def compile_trim_edl():
+        """Parse the segment fields once into the EditDecisionList used by the preview and the cut"""
+        nonlocal trim_edl
+        cuts = []
+        for seg in trim_segments:
+            start_str = seg.get("start", "").strip()
+            end_str = seg.get("end", "").strip()
+            if start_str and end_str:
+                cuts.append((time_to_sec(start_str), time_to_sec(end_str)))
+        trim_edl = logic.EditDecisionList(cuts, trim_file_paths[0] if trim_file_paths else None)
+
     def rebuild_segments_list():
         """Rebuild the entire segments list UI"""
+        compile_trim_edl()
         if not trim_segments_list.current:
             return
         
@@ -3347,19 +3525,11 @@ async def main(page: ft.Page):
     
     def is_position_in_trim_segment(position_seconds):
         """Check if the current position is within a trim segment (to be cut)"""
-        for seg in trim_segments:
-            start_str = seg.get("start", "").strip()
-            end_str = seg.get("end", "").strip()
-            if not start_str or not end_str:
-                continue
-            
-            start_sec = time_to_sec(start_str)
-            end_sec = time_to_sec(end_str)
-            
-            if start_sec <= position_seconds < end_sec:
-                return True, end_sec  # Return True and the end position to skip to
-        
+        cut = trim_edl.cut_at(position_seconds)
+        if cut:
+            return True, cut[1]  # Return True and the end position to skip to
         return False, 0
+
     async def monitor_preview_loop():
         """Polls video position to handle smart skipping"""
         nonlocal trim_last_skip_time
@@ -3461,12 +3631,16 @@ async def main(page: ft.Page):
             return
         
         input_path = trim_file_paths[0]
-        log(f"📽️ Loading video for preview: {os.path.basename(input_path)}")
+        # Heavy sources play from a low-res proxy; its timecodes match the original 1:1
+        play_path = logic.cached_proxy(input_path) or input_path
+        log(f"📽️ Loading video for preview: {os.path.basename(input_path)}" + (" (proxy)" if play_path != input_path else ""))
+        if play_path == input_path:
+            start_trim_proxy(input_path)
         
         # Create VideoMedia and load into player
         try:
              # Create new video control
-            media = VideoMedia(input_path)
+            media = VideoMedia(play_path)
             
             # Hide placeholder with fade
             if trim_placeholder_img.current:
@@ -3512,6 +3686,54 @@ async def main(page: ft.Page):
         except Exception as ex:
             log(f"Error loading video: {ex}")
 
+    trim_proxy_jobs = {}  # input path -> (stop event, thread) of a proxy being built
+
+    def start_trim_proxy(input_path):
+        """Build a playback proxy in the background and swap it into the player once ready"""
+        if input_path in trim_proxy_jobs or not logic.needs_proxy(logic.probe(input_path)):
+            return
+        proxy_stop = threading.Event()
+
+        def proxy_thread():
+            try:
+                proxy = logic.make_proxy(input_path, log_func=log, stop_event=proxy_stop)
+            finally:
+                trim_proxy_jobs.pop(input_path, None)
+            if proxy and trim_file_paths and trim_file_paths[0] == input_path and not trim_is_running:
+                log("⚡ Preview switched to the proxy, cuts still use the original.")
+                page.run_task(swap_to_proxy)
+        thread = threading.Thread(target=proxy_thread, daemon=True)
+        trim_proxy_jobs[input_path] = (proxy_stop, thread)
+        thread.start()
+
+    def cancel_trim_proxies(keep=None, wait=0):
+        """Stop proxy builds for every file but `keep`; `wait` seconds for their ffmpeg to exit"""
+        jobs = [job for path, job in list(trim_proxy_jobs.items()) if path != keep]
+        for proxy_stop, _ in jobs:
+            proxy_stop.set()
+        for _, thread in jobs:
+            thread.join(wait)
+
+    # A proxy encode is a full-length 540p transcode; don't leave it running after exit
+    atexit.register(cancel_trim_proxies, wait=2)
+
+    async def swap_to_proxy():
+        """Reload the player from the proxy and return to the same position"""
+        pos_sec = 0.0
+        try:
+            res = trim_video_player.current.get_current_position()
+            pos_sec = duration_to_sec(await res if asyncio.iscoroutine(res) else res)
+        except:
+            pass
+        await load_video_for_preview()
+        if pos_sec and trim_video_player.current:
+            await asyncio.sleep(0.5)
+            try:
+                res = trim_video_player.current.seek(int(pos_sec * 1000))
+                if asyncio.iscoroutine(res): await res
+            except:
+                pass
+
     def stop_trimming(e):
         nonlocal trim_is_running
         trim_stop_event.set()
@@ -3567,102 +3789,34 @@ async def main(page: ft.Page):
                     show_error("Error", "Could not determine video duration", title="Trimmer Error")
                     return
                 
-                # Sort segments by start time numerically
-                sorted_segments = sorted(trim_segments, key=lambda s: time_to_sec(s.get("start", "0")))
-                
-                # Build list of segments to KEEP (inverse of segments to remove)
-                keep_segments = []
-                current_time_sec = 0.0
-                
-                for seg in sorted_segments:
-                    seg_start_sec = time_to_sec(seg.get("start", "0"))
-                    seg_end_sec = time_to_sec(seg.get("end", ""))
-                    
-                    if not seg_end_sec: continue
-                    
-                    # If there's a gap before this segment, keep it
-                    if seg_start_sec > current_time_sec:
-                        keep_segments.append({"start": format_time(current_time_sec), "end": format_time(seg_start_sec)})
-                    
-                    # Move current time to end of removed segment
-                    if seg_end_sec > current_time_sec:
-                        current_time_sec = seg_end_sec
-                
-                # Keep everything from last removed segment to end of video
-                if current_time_sec < duration:
-                    keep_segments.append({"start": format_time(current_time_sec), "end": format_time(duration)})
+                # Segments to KEEP are the complement of the compiled cut list
+                edl = trim_edl
+                keep_segments = edl.keep_ranges(duration)
                 
                 if len(keep_segments) == 0:
                     show_error("Error", "All segments would be removed. Nothing to output.", title="Trimmer Error")
                     return
                 
-                log(f"  Keeping {len(keep_segments)} segment(s), removing {len(sorted_segments)} segment(s)")
-                
-                # Extract segments to keep
-                temp_files = []
-                base_dir = os.path.dirname(output_path) if output_path else os.getcwd()
+                log(f"  Keeping {len(keep_segments)} segment(s), removing {len(edl)} segment(s)")
                 
-                for idx, seg in enumerate(keep_segments):
-                    if trim_stop_event.is_set():
-                        log("🛑 Trim cancelled.")
-                        # Clean up
-                        for tf in temp_files:
-                            try: os.remove(tf)
-                            except: pass
-                        return
-
-                    start_time = seg["start"]
-                    end_time = seg["end"]
-                    temp_out = os.path.join(base_dir, f"_keep_temp_{idx}.mp4")
-                    temp_files.append(temp_out)
-                    
-                    # Use stream copy for speed (no re-encoding)
-                    cmd = ["ffmpeg", "-y", "-ss", start_time, "-to", end_time, "-i", input_path, 
-                           "-c", "copy", "-avoid_negative_ts", "make_zero", temp_out]
-                    
-                    log(f"  Extracting segment {idx + 1}/{len(keep_segments)}...")
-                    result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
-                    if result.returncode != 0:
-                        log(f"  Warning: Segment {idx + 1} extraction had issues")
-                
-                # Concatenate kept segments
-                if len(temp_files) == 1:
-                    # Only one segment, just rename it
-                    import shutil
-                    shutil.move(temp_files[0], output_path)
+                if trim_stop_event.is_set():
+                    log("🛑 Trim cancelled.")
+                    return
+
+                # One stream-copy pass over all kept ranges, no temp files next to the output
+                cut = logic.smart_cut if user_settings.get("frame_accurate_cuts", True) else logic.cut_keep_ranges
+                ok, result = cut(input_path, keep_segments, output_path, log, trim_stop_event)
+                if ok:
                     log(f"✅ Success! Saved to: {os.path.basename(output_path)}")
-                    show_success(f"Removed {len(sorted_segments)} segment(s) successfully!")
+                    show_success(f"Removed {len(edl)} segment(s) successfully!")
                     play_complete_ding()
                     if user_settings.get("auto_open_folder"):
                         open_folder(output_path)
+                elif result == "Cancelled":
+                    log("🛑 Trim cancelled.")
                 else:
-                    # Multiple segments, concatenate them
-                    concat_file = os.path.join(base_dir, "_concat_list.txt")
-                    with open(concat_file, "w") as f:
-                        for tf in temp_files:
-                            f.write(f"file '{os.path.basename(tf)}'\n")
-                    
-                    log(f"  Concatenating {len(temp_files)} segments...")
-                    concat_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_file, 
-                                  "-c", "copy", output_path]
-                    result = subprocess.run(concat_cmd, capture_output=True, text=True, cwd=base_dir, creationflags=SUBPROCESS_FLAGS)
-                    
-                    # Cleanup
-                    for tf in temp_files:
-                        try: os.remove(tf)
-                        except: pass
-                    try: os.remove(concat_file)
-                    except: pass
-                    
-                    if result.returncode == 0:
-                        log(f"✅ Success! Saved to: {os.path.basename(output_path)}")
-                        show_success(f"Removed {len(sorted_segments)} segment(s) successfully!")
-                        play_complete_ding()
-                        if user_settings.get("auto_open_folder"):
-                            open_folder(output_path)
-                    else:
-                        show_error("Concat failed", result.stderr, title="Trimmer Error")
-                        log(f"❌ Failed: {result.stderr}")
+                    show_error("Cut failed", result, title="Trimmer Error")
+                    log(f"❌ Failed: {result}")
                         
             except Exception as ex:
                 import traceback
@@ -3709,20 +3863,16 @@ async def main(page: ft.Page):
         threading.Thread(target=trim_thread, daemon=True).start()
 
     def get_video_duration(path):
-        """Get video duration using ffprobe"""
-        try:
-            cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", 
-                   "-of", "default=noprint_wrappers=1:nokey=1", path]
-            result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
-            return float(result.stdout.strip())
-        except:
-            return 0.0
+        """Get video duration from the shared probe cache"""
+        return logic.get_video_duration(path, log_func=None) or 0.0
 
     async def on_trim_pick(files):
         nonlocal trim_file_paths, trim_video_duration, trim_target_path
         if files and len(files) > 0:
             # Only take the first file
             trim_file_paths = [files[0].path]
+            # A proxy still building for the previous file would only compete for the CPU
+            cancel_trim_proxies(keep=trim_file_paths[0])
             trim_input_field.current.value = os.path.basename(trim_file_paths[0])
             trim_input_field.current.update()
             
@@ -3734,6 +3884,9 @@ async def main(page: ft.Page):
             
             # Get duration
             trim_video_duration = get_video_duration(trim_file_paths[0])
+            compile_trim_edl()
+            # Build the keyframe index in the background so cuts and snapping don't wait on it
+            threading.Thread(target=logic.get_keyframe_index, args=(trim_file_paths[0],), daemon=True).start()
             await load_video_for_preview()
             page.update()
 
@@ -3748,6 +3901,38 @@ async def main(page: ft.Page):
             trim_output_field.current.value = os.path.basename(path)
             page.update()
 
+    async def save_trim_edl_click(e):
+        if not trim_edl:
+            log("❌ No complete trim segments to save.")
+            return
+        base = os.path.splitext(os.path.basename(trim_file_paths[0]))[0] if trim_file_paths else "edits"
+        path = await trim_save_picker.save_file(file_name=f"{base}_edits.json")
+        if path:
+            try:
+                trim_edl.save(path)
+                log(f"💾 Saved {len(trim_edl)} trim segment(s) to {os.path.basename(path)}")
+            except Exception as ex:
+                show_error("Could not save edits", str(ex), title="Trimmer Error")
+
+    async def load_trim_edl_click(e):
+        files = await trim_picker.pick_files(allow_multiple=False, allowed_extensions=["json"])
+        if not files:
+            return
+        try:
+            edl = logic.EditDecisionList.load(files[0].path)
+        except Exception as ex:
+            show_error("Could not load edits", str(ex), title="Trimmer Error")
+            return
+        if edl.source and trim_file_paths and os.path.abspath(edl.source) != os.path.abspath(trim_file_paths[0]):
+            log(f"⚠️ These edits were made for {os.path.basename(edl.source)}")
+        trim_segments[:] = [{"start": format_time(start), "end": format_time(end)} for start, end in edl]
+        rebuild_segments_list()
+        log(f"📂 Loaded {len(edl)} trim segment(s) from {os.path.basename(files[0].path)}")
+
+    def on_frame_accurate_change(e):
+        user_settings["frame_accurate_cuts"] = e.control.value
+        save_settings(user_settings)
+
     trim_picker = ft.FilePicker()
     trim_save_picker = ft.FilePicker()
     # page.overlay.extend([
@@ -3825,6 +4010,28 @@ async def main(page: ft.Page):
             ft.Icon(ft.Icons.CONTENT_CUT_ROUNDED, color=ft.Colors.PRIMARY, size=20),
             ft.Text("Trim Segments", size=16, weight=ft.FontWeight.W_900),
             ft.Container(expand=True),
+            ft.Text("Frame Accurate", color=ft.Colors.ON_SURFACE_VARIANT, size=13),
+            ft.Switch(
+                value=user_settings.get("frame_accurate_cuts", True),
+                on_change=on_frame_accurate_change,
+                active_color=ft.Colors.PRIMARY,
+                scale=0.8,
+                tooltip="Re-encode only the frames around each cut so it lands exactly where marked. Off cuts on the nearest keyframes."
+            ),
+            ft.IconButton(
+                icon=ft.Icons.FILE_OPEN_ROUNDED,
+                icon_color=ft.Colors.ON_SURFACE_VARIANT,
+                icon_size=20,
+                tooltip="Load segments from an edit list",
+                on_click=load_trim_edl_click
+            ),
+            ft.IconButton(
+                icon=ft.Icons.SAVE_ROUNDED,
+                icon_color=ft.Colors.ON_SURFACE_VARIANT,
+                icon_size=20,
+                tooltip="Save segments as an edit list",
+                on_click=save_trim_edl_click
+            ),
             ft.IconButton(
                 icon=ft.Icons.ADD_CIRCLE_ROUNDED,
                 icon_color=ft.Colors.PRIMARY,
@@ -4154,15 +4361,35 @@ async def main(page: ft.Page):
         nonlocal merger_start_time
         merger_start_time = time.time()
         
+        _, target_policy, merge_target = MERGE_TARGET_CHOICES.get(
+            user_settings.get("merge_target", "majority"), MERGE_TARGET_CHOICES["majority"])
+        
+        append_mode = bool(merger_append_switch.current and merger_append_switch.current.value) and len(video_paths) > 1
+
         def do_merge():
             try:
-                success, result = logic.merge_videos(
-                    video_paths, 
-                    merger_target_path, 
-                    merger_log, 
-                    stop_event=merger_stop_event,
-                    use_gpu=user_settings.get("use_gpu", True)
-                )
+                if append_mode:
+                    # The first video is an existing merge; only the clips after it get processed
+                    success, result = logic.append_videos(
+                        video_paths[0],
+                        video_paths[1:],
+                        merger_target_path,
+                        merger_log,
+                        stop_event=merger_stop_event,
+                        use_gpu=user_settings.get("use_gpu", True),
+                        progress_callback=on_merger_progress
+                    )
+                else:
+                    success, result = logic.merge_videos(
+                        video_paths, 
+                        merger_target_path, 
+                        merger_log, 
+                        stop_event=merger_stop_event,
+                        use_gpu=user_settings.get("use_gpu", True),
+                        progress_callback=on_merger_progress,
+                        target_policy=target_policy,
+                        target=merge_target
+                    )
                 if success:
                     merger_log(f"✨ MERGE SUCCESS: {result}")
                     play_complete_ding()
@@ -4196,65 +4423,64 @@ async def main(page: ft.Page):
     merger_total_duration = 0 # Store total duration of all segments
     merger_start_time = 0
 
-    def merger_log(msg, replace_last=False):
-        # Check if this is a progress line
-        if "time=" in msg and "frame=" in msg:
-            # Parse time
-             try:
-                import re
-                match = re.search(r"time=(\d{2}:\d{2}:\d{2}\.\d{2})", msg)
-                if match and merger_total_duration > 0:
-                    t_str = match.group(1)
-                    parts = t_str.split(':')
-                    secs = float(parts[0])*3600 + float(parts[1])*60 + float(parts[2])
-                    
-                    pct = 0
-                    if merger_total_duration > 0:
-                        pct = min(secs / merger_total_duration, 1.0)
-                    
-                    update_merger_progress_bar(pct)
-                    
-                    # Update percentage text
-                    if merger_pct_text.current:
-                        merger_pct_text.current.value = f"{int(pct*100)}%"
-                        merger_pct_text.current.update()
-                    
-                    # Update time remaining text
-                    if merger_status_text.current:
-                        eta_str = "---"
-                        if pct > 0.01 and merger_start_time > 0: # Wait for 1% progress for better estimate
-                            elapsed = time.time() - merger_start_time
-                            total_est = elapsed / pct
-                            remaining = total_est - elapsed
-                            if remaining < 0: remaining = 0
-                            
-                            m, s = divmod(int(remaining), 60)
-                            h, m = divmod(m, 60)
-                            if h > 0:
-                                eta_str = f"{h:02d}:{m:02d}:{s:02d}"
-                            else:
-                                eta_str = f"{m:02d}:{s:02d}"
-                        
-                        merger_status_text.current.value = eta_str
-                merger_status_text.current.update()
-             except: pass
+    def on_merger_progress(prog):
+        if merger_total_duration <= 0: return
+        pct = min(prog.secs / merger_total_duration, 1.0)
         
-        # Log to the scrollable view if enabled
-        page.run_task(log_to_view, merger_log_list, msg, replace_last)
+        eta_str = "---"
+        if pct > 0.01 and merger_start_time > 0: # Wait for 1% progress for better estimate
+            elapsed = time.time() - merger_start_time
+            total_est = elapsed / pct
+            remaining = total_est - elapsed
+            if remaining < 0: remaining = 0
+            
+            m, s = divmod(int(remaining), 60)
+            h, m = divmod(m, 60)
+            if h > 0:
+                eta_str = f"{h:02d}:{m:02d}:{s:02d}"
+            else:
+                eta_str = f"{m:02d}:{s:02d}"
         
-        if "frame=" not in msg:
-            print(msg)
+        def apply():
+            update_merger_progress_bar(pct, push=False)
+            if merger_pct_text.current: merger_pct_text.current.value = f"{int(pct*100)}%"
+            if merger_status_text.current: merger_status_text.current.value = eta_str
+        
+        ui_pump.submit("merge", apply)
+
+    def merger_log(msg, replace_last=False):
+        # Log to the scrollable view if enabled
+        log_to_view(merger_log_list, msg, replace_last)
+
+    merger_thumbs = {}  # path -> base64 JPEG, filled in by the thumbnail service
+
+    def on_merger_thumbnail(path, thumb):
+        merger_thumbs[path] = None  # Failures are remembered too, so they aren't retried on every rebuild
+        if not thumb:
+            return
+        try:
+            with open(thumb, "rb") as f:
+                merger_thumbs[path] = base64.b64encode(f.read()).decode("utf-8")
+        except OSError:
+            return
+        # Many thumbnails finishing together still cost a single rebuild per pump tick
+        ui_pump.submit("merger_thumbs", rebuild_merger_segments_list)
 
     def build_merger_card(idx):
         seg = merger_segments[idx]
         file_path = seg.get("path", "")
         file_name = os.path.basename(file_path) if file_path else "No file selected"
+        thumb = merger_thumbs.get(file_path)
+        if thumb:
+            leading = ft.Image(src=thumb, width=64, height=36, fit=ft.BoxFit.COVER, border_radius=6)
+        else:
+            leading = ft.Icon(ft.Icons.VIDEO_FILE_ROUNDED, size=20, color=ft.Colors.ON_SURFACE_VARIANT)
         
         return ft.Container(
             content=ft.Row([
                 ft.Text(str(idx + 1), size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.PRIMARY, width=30),
                 ft.Row([
-                    ft.Icon(ft.Icons.VIDEO_FILE_ROUNDED, size=20, color=ft.Colors.ON_SURFACE_VARIANT),
+                    leading,
                     ft.Text(file_name, size=14, weight=ft.FontWeight.W_500, expand=True, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
                 ], expand=True, spacing=10),
                 ft.Row([
@@ -4282,7 +4508,11 @@ async def main(page: ft.Page):
         for seg in merger_segments:
             p = seg.get("path")
             if p and os.path.exists(p):
-                merger_total_duration += logic.get_video_duration(p)
+                merger_total_duration += logic.get_video_duration(p, log_func=None) or 0
+
+        missing = [seg["path"] for seg in merger_segments if seg.get("path") and seg["path"] not in merger_thumbs]
+        if missing:
+            logic.request_thumbnails(missing, callback=on_merger_thumbnail)
 
         controls = []
         for idx in range(len(merger_segments)):
@@ -4307,6 +4537,10 @@ async def main(page: ft.Page):
             merger_output_field.current.value = os.path.basename(path)
             merger_output_field.current.update()
 
+    def on_merge_target_change(e):
+        user_settings["merge_target"] = e.control.value
+        save_settings(user_settings)
+
     # --- Merger UI Layout ---
     merger_file_section = ft.Container(
         content=ft.Column([
@@ -4339,8 +4573,27 @@ async def main(page: ft.Page):
                         content_padding=10
                     ), 
                     expand=True
+                ),
+                ft.Dropdown(
+                    label="Output Size",
+                    width=170,
+                    options=[ft.DropdownOption(key, label) for key, (label, _, _) in MERGE_TARGET_CHOICES.items()],
+                    value=user_settings.get("merge_target", "majority"),
+                    on_select=on_merge_target_change,
+                    tooltip="Used when clips have to be re-encoded to match",
+                    border_radius=10,
+                    text_size=13,
+                    content_padding=5,
+                    height=40
+                ),
+                ft.Container(
+                    content=ft.Row([
+                        ft.Text("Append", color=ft.Colors.ON_SURFACE_VARIANT, size=13),
+                        ft.Switch(ref=merger_append_switch, value=False, active_color=ft.Colors.PRIMARY, scale=0.8),
+                    ], spacing=0, tight=True),
+                    tooltip="Treat the first video as an existing merge and only process the videos added after it"
                 )
-            ], spacing=10)
+            ], spacing=10, vertical_alignment=ft.CrossAxisAlignment.CENTER)
         ]),
         padding=0, 
         margin=ft.Margin.only(bottom=5)
@@ -4669,12 +4922,7 @@ async def main(page: ft.Page):
 
         def _push_log(msg):
             """Send a line to the audio log panel and status text."""
-            print(msg)
-            if audio_log_list.current:
-                page.run_task(
-                    log_to_view, audio_log_list,
-                    ft.Text(msg, size=12, color=ft.Colors.ON_SURFACE_VARIANT, selectable=True)
-                )
+            log_to_view(audio_log_list, msg)
             if audio_status_text.current and msg.strip():
                 # Show shortest meaningful last line in the status label
                 short = msg.strip()[:80]
@@ -4708,7 +4956,8 @@ async def main(page: ft.Page):
                     dur = silence_dur_slider.current.value if silence_dur_slider.current else 0.5
                     success, msg = logic.remove_silence(
                         audio_input_path, audio_output_path, db, dur,
-                        _push_log, stop_event=audio_stop_event
+                        _push_log, stop_event=audio_stop_event,
+                        frame_accurate=user_settings.get("frame_accurate_cuts", True)
                     )
 
                 if success:
@@ -4756,6 +5005,13 @@ async def main(page: ft.Page):
     audio_time_text = ft.Ref[ft.Text]()
     audio_log_list = ft.Ref[ft.ListView]()
 
+    # Every log view exists now, so the pump can start drawing them
+    log_views = {
+        "compressor": compressor_log_list, "converter": converter_log_list, "merger": merger_log_list,
+        "trimmer": trimmer_log_list, "audio": audio_log_list,
+    }
+    ui_pump.add_ticker(render_logs)
+
     # File section (pill buttons + input/output fields)
     audio_file_section = ft.Container(
         content=ft.Column([
@@ -5133,6 +5389,8 @@ async def main(page: ft.Page):
         
         # Immediate UI reflection for logs
         if key == "show_logs":
+            if e.control.value:
+                log_store.mark_dirty(log_views.keys())
             for ref in [compressor_log_list, converter_log_list, merger_log_list, trimmer_log_list]:
                 if ref.current and ref.current.parent:
                     ref.current.parent.visible = e.control.value
@@ -5178,6 +5436,45 @@ async def main(page: ft.Page):
     setting_auto_open_switch = ft.Switch(value=user_settings.get("auto_open_folder", False), on_change=lambda e: toggle_setting("auto_open_folder", e), active_color=ft.Colors.PRIMARY)
     setting_ding_switch = ft.Switch(value=user_settings.get("play_ding", True), on_change=lambda e: toggle_setting("play_ding", e), active_color=ft.Colors.PRIMARY)
     setting_gpu_switch = ft.Switch(value=user_settings.get("use_gpu", True), on_change=lambda e: toggle_setting("use_gpu", e), active_color=ft.Colors.PRIMARY)
+
+    def recheck_gpu_encoders(e):
+        """Forget cached GPU encoder verdicts and test every hardware encoder again"""
+        e.control.disabled = True
+        e.control.update()
+        def worker():
+            try:
+                logic.refresh_capabilities(log)
+                working = [enc for enc, ok in logic.check_hardware_encoders(log).items() if ok]
+                show_success("Working GPU encoders: " + ", ".join(working) if working else "No working GPU encoders found.")
+            finally:
+                e.control.disabled = False
+                e.control.update()
+        threading.Thread(target=worker, daemon=True).start()
+
+    def set_slot_setting(key, e):
+        user_settings[key] = int(e.control.value)
+        save_settings(user_settings)
+
+    setting_parallel_jobs_dropdown = ft.Dropdown(
+        value=str(user_settings.get("max_parallel_jobs", 0)),
+        options=[ft.DropdownOption("0", "Auto")] + [ft.DropdownOption(str(n), str(n)) for n in (1, 2, 3, 4, 6, 8)],
+        on_select=lambda e: set_slot_setting("max_parallel_jobs", e),
+        border_radius=10,
+        text_size=13,
+        content_padding=5,
+        height=40,
+        width=100,
+    )
+    setting_gpu_slots_dropdown = ft.Dropdown(
+        value=str(user_settings.get("gpu_slots", logic.DEFAULT_GPU_SLOTS)),
+        options=[ft.DropdownOption(str(n), str(n)) for n in (1, 2, 3, 4)],
+        on_select=lambda e: set_slot_setting("gpu_slots", e),
+        border_radius=10,
+        text_size=13,
+        content_padding=5,
+        height=40,
+        width=100,
+    )
     setting_os_theme_switch = ft.Switch(value=user_settings.get("follow_os_theme", False), on_change=lambda e: toggle_setting("follow_os_theme", e), active_color=ft.Colors.PRIMARY)
     setting_transparent_switch = ft.Switch(
         value=user_settings.get("transparent_app", False), 
@@ -5387,7 +5684,37 @@ async def main(page: ft.Page):
                                         ft.Text("Use graphics card for faster processing. Will fallback to software if no GPU is detected.", size=12, color=ft.Colors.ON_SURFACE_VARIANT),
                                     ], spacing=0),
                                 ], spacing=15),
-                                setting_gpu_switch
+                                ft.Row([
+                                    ft.IconButton(
+                                        ft.Icons.REFRESH_ROUNDED,
+                                        icon_size=20,
+                                        tooltip="Re-check GPU encoders (e.g. after a driver update or if the GPU was busy)",
+                                        on_click=recheck_gpu_encoders
+                                    ),
+                                    setting_gpu_switch
+                                ], spacing=5)
+                            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+
+                            # Batch Concurrency
+                            ft.Row([
+                                ft.Row([
+                                    ft.Icon(ft.Icons.VIEW_STREAM_ROUNDED, size=20),
+                                    ft.Column([
+                                        ft.Text("Parallel Software Jobs", size=16, weight=ft.FontWeight.W_600),
+                                        ft.Text("Files compressed at once on the CPU in a batch. Auto picks from the core count.", size=12, color=ft.Colors.ON_SURFACE_VARIANT),
+                                    ], spacing=0),
+                                ], spacing=15),
+                                setting_parallel_jobs_dropdown
+                            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                            ft.Row([
+                                ft.Row([
+                                    ft.Icon(ft.Icons.MEMORY_ROUNDED, size=20),
+                                    ft.Column([
+                                        ft.Text("Parallel GPU Jobs", size=16, weight=ft.FontWeight.W_600),
+                                        ft.Text("Hardware encodes at once in a batch. Consumer GPUs limit concurrent sessions.", size=12, color=ft.Colors.ON_SURFACE_VARIANT),
+                                    ], spacing=0),
+                                ], spacing=15),
+                                setting_gpu_slots_dropdown
                             ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                             
                             # FFmpeg Log Toggle
@@ -5399,11 +5726,19 @@ async def main(page: ft.Page):
                                         ft.Text("Show live FFmpeg output during tasks.", size=12, color=ft.Colors.ON_SURFACE_VARIANT),
                                     ], spacing=0),
                                 ], spacing=15),
-                                ft.Switch(
-                                    value=user_settings.get("show_logs", False), 
-                                    on_change=lambda e: toggle_setting("show_logs", e), 
-                                    active_color=ft.Colors.PRIMARY
-                                )
+                                ft.Row([
+                                    ft.IconButton(
+                                        ft.Icons.DESCRIPTION_OUTLINED,
+                                        tooltip="Open full log file",
+                                        on_click=lambda _: open_file(log_store.log_path),
+                                        icon_size=20
+                                    ),
+                                    ft.Switch(
+                                        value=user_settings.get("show_logs", False), 
+                                        on_change=lambda e: toggle_setting("show_logs", e), 
+                                        active_color=ft.Colors.PRIMARY
+                                    )
+                                ], spacing=5)
                             ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                         ]),
                         padding=20, bgcolor=ft.Colors.SURFACE_CONTAINER_HIGHEST, border_radius=15,
@@ -5805,6 +6140,12 @@ def run_cli():
     do not accidentally re-initialize the entire GUI, preventing fork bombs.
     """
     print("\n--- Video Utilities (CLI Mode) ---")
+
+    if "--recheck-gpu" in sys.argv:
+        # Drop cached encoder verdicts so GPU encoders that failed before get tested again
+        logic.refresh_capabilities(print)
+        for enc, ok in logic.check_hardware_encoders(print).items():
+            print(f"  {'✅' if ok else '❌'} {enc}")
     
     # Helper to get arg or prompt
     def get_arg_or_input(flag, prompt, default=None):
@@ -5872,25 +6213,47 @@ def run_cli():
         if fmt and not fmt.startswith("."):
             fmt = "." + fmt
             
-        output_file = get_arg_or_input("--output", "Output Path (leave empty for auto)", "auto")
-        if output_file == "auto":
-            output_file = None
+        # A folder as input compresses every video inside it as one batch
+        if os.path.isdir(input_file):
+            video_exts = (".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".ts", ".m4v", ".wmv")
+            input_files = sorted(os.path.join(input_file, f) for f in os.listdir(input_file) if f.lower().endswith(video_exts))
+            output_dir = get_arg_or_input("--output", "Output Folder (leave empty for same folder)", "auto")
+            output_dir = input_file if output_dir == "auto" else output_dir
+            os.makedirs(output_dir, exist_ok=True)
+            outputs = [os.path.join(output_dir, f"{os.path.splitext(os.path.basename(f))[0]}_compressed{fmt}") for f in input_files]
         else:
-            # If they provided an extension, respect it. 
-            # If no extension provided, add the chosen format.
-            _, ext = os.path.splitext(output_file)
-            if not ext:
-                output_file = f"{output_file}{fmt}"
-
-        print(f"\n🚀 STARTING COMPRESSION: {os.path.basename(input_file)}")
-        success, result = logic.auto_compress(
-            input_file=input_file,
-            target_mb=target_mb,
-            codec=codec,
-            use_gpu=use_gpu,
-            output_file=output_file,
-            log_func=cli_log
-        )
+            input_files = [input_file]
+            output_file = get_arg_or_input("--output", "Output Path (leave empty for auto)", "auto")
+            if output_file == "auto":
+                output_file = None
+            else:
+                # If they provided an extension, respect it. 
+                # If no extension provided, add the chosen format.
+                _, ext = os.path.splitext(output_file)
+                if not ext:
+                    output_file = f"{output_file}{fmt}"
+            outputs = [output_file]
+
+        try:
+            max_jobs = int(get_arg_or_input("--jobs", "Parallel jobs (0 = auto)", "0")) if len(input_files) > 1 else 1
+        except ValueError:
+            max_jobs = 0
+        try:
+            gpu_slots = int(get_arg_or_input("--gpu-jobs", "Parallel GPU jobs", str(logic.DEFAULT_GPU_SLOTS))) if use_gpu and len(input_files) > 1 else 1
+        except ValueError:
+            gpu_slots = logic.DEFAULT_GPU_SLOTS
+
+        print(f"\n🚀 STARTING COMPRESSION: {len(input_files)} file(s)")
+        jobs = [logic.CompressionJob(f, target_mb, codec, use_gpu, output_file=o) for f, o in zip(input_files, outputs)]
+        scheduler = logic.JobScheduler(cpu_slots=max_jobs or None, gpu_slots=gpu_slots, log_func=cli_log)
+        try:
+            scheduler.run(jobs)
+        except KeyboardInterrupt:
+            scheduler.cancel_all()
+        if len(jobs) > 1:
+            scheduler.log_stats()
+        success = bool(jobs) and all(j.status == "done" for j in jobs)
+        result = ", ".join(j.output_file for j in jobs if j.status == "done")
     
     if success:
         print(f"\n✨ SUCCESS: {result}")
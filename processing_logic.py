@@ -6,6 +6,15 @@ import threading
 import re
 import shutil
 import tempfile
+import json
+import functools
+import hashlib
+import time
+import io
+import bisect
+from array import array
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Logic to prevent console windows from popping up on Windows
 SUBPROCESS_FLAGS = 0
@@ -15,6 +24,61 @@ if os.name == 'nt':
 # Define for cross-platform safety (only used on Windows)
 CREATE_NEW_CONSOLE = 16
 
+# Persistent cache location. Kept apart from the GUI temp dir, which is wiped on exit.
+if os.name == 'nt':
+    CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA', tempfile.gettempdir()), 'video-utilities', 'cache')
+else:
+    CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'video-utilities-cache')
+
+def get_cache_path(*parts):
+    """Return a path inside CACHE_DIR, creating its parent folder if needed."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def load_json_cache(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except:
+        return None
+
+def save_json_cache(path, data):
+    # Write-then-rename so a concurrent reader never sees a half-written file
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except:
+        pass
+
+def touch_cache_file(path):
+    """Mark a cached file as recently used for prune_cache_dir."""
+    try: os.utime(path, None)
+    except OSError: pass
+
+def prune_cache_dir(directory, max_bytes):
+    """Delete the least recently used files in `directory` until it fits in `max_bytes`."""
+    try:
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
 # --- System & Setup Utilities ---
 
 def is_ffmpeg_installed():
@@ -81,26 +145,283 @@ def hms_to_seconds(hms):
     except: pass
     return 0
 
-def get_video_duration(path, log_func=print):
-    """Return duration in seconds via ffprobe, or None on failure."""
+# --- Media Probing ---
+
+# Compact record returned by probe(). `streams` holds trimmed per-stream dicts,
+# the flat fields describe the first video/audio stream for quick access.
+MediaInfo = namedtuple("MediaInfo", [
+    "path", "duration", "size", "bit_rate", "format_name", "streams",
+    "v_codec", "v_profile", "width", "height", "fps", "pix_fmt", "v_bitrate", "time_base",
+    "a_codec", "a_bitrate", "sample_rate", "channels", "channel_layout",
+    "has_b_frames", "intra_only", "rotation",
+])
+
+PROBE_CACHE_SIZE = 512
+
+# Stream keys worth keeping from ffprobe's (very verbose) JSON
+_STREAM_KEYS = (
+    "index", "codec_type", "codec_name", "profile", "width", "height", "pix_fmt",
+    "r_frame_rate", "avg_frame_rate", "time_base", "bit_rate", "sample_rate",
+    "channels", "channel_layout", "has_b_frames", "duration", "nb_frames",
+)
+
+# Codecs where every frame is a keyframe (any timestamp is a clean cut point)
+_INTRA_ONLY_CODECS = {"mjpeg", "prores", "dnxhd", "ffv1", "huffyuv", "rawvideo", "png", "qtrle", "cinepak", "utvideo"}
+
+def _to_float(value, default=None):
     try:
-        cmd = [
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True,
-                                creationflags=SUBPROCESS_FLAGS)
-        output = result.stdout.strip()
-        if not output:
-             return None
-        return float(output)
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _to_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def parse_frame_rate(rate):
+    """Parse an ffprobe rate such as '30000/1001' or '25' into a float (0 if unknown)."""
+    try:
+        if "/" in str(rate):
+            n, d = map(float, str(rate).split("/"))
+            return n / d if d else 0.0
+        return float(rate)
+    except (TypeError, ValueError):
+        return 0.0
+
+def file_fingerprint(path):
+    """Identity of a file on disk: (abspath, size, mtime_ns, inode). Changes whenever the file does."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+@functools.lru_cache(maxsize=PROBE_CACHE_SIZE)
+def _probe_fingerprint(fingerprint):
+    # Raises on failure so lru_cache never memoizes a broken probe
+    path = fingerprint[0]
+    cmd = ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path]
+    result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(result.stderr.strip() or f"ffprobe exited with code {result.returncode}")
+    data = json.loads(result.stdout)
+    fmt = data.get("format", {})
+
+    streams = tuple({k: s[k] for k in _STREAM_KEYS if k in s} for s in data.get("streams", []))
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    fps = parse_frame_rate(video.get("avg_frame_rate")) or parse_frame_rate(video.get("r_frame_rate"))
+
+    # Phone footage is commonly stored landscape with a display rotation applied on playback
+    rotation = 0
+    raw_video = next((st for st in data.get("streams", []) if st.get("codec_type") == "video"), {})
+    for side_data in raw_video.get("side_data_list", []):
+        if "rotation" in side_data:
+            rotation = _to_int(side_data["rotation"], 0)
+    if not rotation:
+        rotation = _to_int(raw_video.get("tags", {}).get("rotate"), 0)
+    duration = _to_float(fmt.get("duration")) or _to_float(video.get("duration")) or _to_float(audio.get("duration"))
+
+    return MediaInfo(
+        path=path,
+        duration=duration,
+        size=fingerprint[1],
+        bit_rate=_to_int(fmt.get("bit_rate")),
+        format_name=fmt.get("format_name"),
+        streams=streams,
+        v_codec=video.get("codec_name"),
+        v_profile=video.get("profile"),
+        width=_to_int(video.get("width")),
+        height=_to_int(video.get("height")),
+        fps=fps,
+        pix_fmt=video.get("pix_fmt"),
+        v_bitrate=_to_int(video.get("bit_rate")),
+        time_base=video.get("time_base"),
+        a_codec=audio.get("codec_name"),
+        a_bitrate=_to_int(audio.get("bit_rate")),
+        sample_rate=_to_int(audio.get("sample_rate")),
+        channels=_to_int(audio.get("channels")),
+        channel_layout=audio.get("channel_layout"),
+        has_b_frames=_to_int(video.get("has_b_frames"), 0),
+        intra_only=video.get("codec_name") in _INTRA_ONLY_CODECS,
+        rotation=rotation,
+    )
+
+def probe(path, log_func=None):
+    """
+    Probe a media file once with ffprobe and return a MediaInfo record, or None on failure.
+    Results are memoized by file fingerprint, so every caller shares one ffprobe per file
+    version; an edited or replaced file is re-probed automatically.
+    """
+    try:
+        return _probe_fingerprint(file_fingerprint(path))
     except Exception as e:
-        log_func(f"⚠️ Could not get duration: {e}")
+        if log_func:
+            log_func(f"⚠️ Could not probe {os.path.basename(str(path))}: {e}")
         return None
 
-def get_hardware_info():
+def clear_probe_cache():
+    _probe_fingerprint.cache_clear()
+
+def get_video_duration(path, log_func=print):
+    """Return duration in seconds via ffprobe, or None on failure."""
+    info = probe(path, log_func)
+    if info is None or info.duration is None:
+        return None
+    return info.duration
+
+def get_display_size(info):
+    """(width, height) as ffmpeg's filters see them, i.e. after autorotation. None if unknown."""
+    if info is None or not info.width or not info.height:
+        return None
+    if abs(info.rotation or 0) % 180 == 90:
+        return info.height, info.width
+    return info.width, info.height
+
+def get_video_fps(path, default=30.0):
+    """Return the frame rate of the first video stream, or `default` if unknown."""
+    info = probe(path)
+    return info.fps if info and info.fps else default
+
+# --- FFmpeg Runner ---
+# Every long-running ffmpeg call goes through run_ffmpeg, which asks ffmpeg for its
+# machine-readable `-progress` output instead of scraping the human `-stats` line.
+# Each key=value block becomes one Progress record; stderr is reduced to real errors.
+
+class Progress(namedtuple("Progress", "frame fps out_time_us total_size speed done")):
+    """One -progress block. `total_size` is bytes written to the first output so far."""
+    __slots__ = ()
+
+    @property
+    def secs(self):
+        return self.out_time_us / 1000000.0
+
+FFMPEG_ERROR_TAIL = 20  # Non-progress lines kept for failure reports
+
+def _progress_record(fields, done=False):
+    speed = fields.get("speed", "").rstrip("x")
+    return Progress(
+        frame=_to_int(fields.get("frame"), 0),
+        fps=_to_float(fields.get("fps"), 0.0),
+        # Older builds only emit out_time_ms, which despite the name is also microseconds
+        out_time_us=max(_to_int(fields.get("out_time_us", fields.get("out_time_ms")), 0), 0),
+        total_size=_to_int(fields.get("total_size"), 0),
+        speed=_to_float(speed, 0.0),
+        done=done,
+    )
+
+def run_ffmpeg(cmd, on_progress=None, stop_event=None, preview=None):
+    """
+    Run an ffmpeg argv with `-progress` reporting.
+    `on_progress(Progress)` is called once per block; returning True kills the process.
+    A `preview` (PreviewFrames) takes stdout for its JPEG stream, progress then uses stderr.
+    Returns (returncode, error_lines); returncode is None if stopped or aborted.
+    """
+    progress_fd = 'pipe:2' if preview is not None else 'pipe:1'
+    cmd = [cmd[0], '-nostats', '-loglevel', 'error', '-progress', progress_fd] + list(cmd[1:])
+    if preview is None:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   universal_newlines=True, bufsize=1, creationflags=SUBPROCESS_FLAGS)
+        lines = process.stdout
+    else:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAGS)
+        threading.Thread(target=preview.pump, args=(process.stdout,), daemon=True).start()
+        lines = io.TextIOWrapper(process.stderr, encoding="utf-8", errors="replace")
+
+    errors = deque(maxlen=FFMPEG_ERROR_TAIL)
+    fields = {}
+    try:
+        for line in lines:
+            if stop_event and stop_event.is_set():
+                break
+            key, sep, value = line.strip().partition("=")
+            if not sep or " " in key:
+                if line.strip():
+                    errors.append(line.strip())
+                continue
+            if key != "progress":
+                fields[key] = value
+                continue
+            record = _progress_record(fields, done=(value == "end"))
+            fields = {}
+            if on_progress and on_progress(record):
+                break
+        else:
+            process.wait()
+            return process.returncode, list(errors)
+    finally:
+        # Stopped, aborted, or the reader failed: make sure ffmpeg does not outlive us
+        if process.poll() is None:
+            try: process.terminate()
+            except: pass
+            process.wait()
+    return None, list(errors)
+
+# --- FFmpeg Capability Registry ---
+# Encoders, decoders, filters, muxers, hwaccels and the detected GPU vendor are gathered
+# once per ffmpeg binary and cached on disk, keyed by the binary's path, mtime and a hash
+# of its `-version` banner. Lookups afterwards are plain dict/set membership tests.
+
+_caps = None
+_caps_lock = threading.Lock()
+
+def _ffmpeg_binary_key():
+    ffmpeg_path = shutil.which('ffmpeg')
+    if not ffmpeg_path:
+        return None
+    ffmpeg_path = os.path.realpath(ffmpeg_path)
+    version = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS).stdout
+    return {
+        "path": ffmpeg_path,
+        "mtime_ns": os.stat(ffmpeg_path).st_mtime_ns,
+        "version_hash": hashlib.sha1(version.encode('utf-8', 'replace')).hexdigest(),
+    }
+
+def _ffmpeg_list(flag):
+    try:
+        return subprocess.check_output(['ffmpeg', '-hide_banner', flag], encoding='utf-8', errors='replace', stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
+    except:
+        return ""
+
+def _parse_codec_list(output):
+    """Parse `-encoders`/`-decoders` output into {name: type letter (V/A/S)}."""
+    codecs = {}
+    in_body = False
+    for line in output.splitlines():
+        if not in_body:
+            in_body = line.strip().startswith('---')
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            codecs[parts[1]] = parts[0][0]
+    return codecs
+
+def _parse_filter_list(output):
+    filters = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and "->" in parts[2]:
+            filters.append(parts[1])
+    return filters
+
+def _parse_muxer_list(output):
+    muxers = []
+    in_body = False
+    for line in output.splitlines():
+        if not in_body:
+            in_body = line.strip().startswith('--')
+            continue
+        parts = line.split()
+        if len(parts) >= 2 and 'E' in parts[0]:
+            # Entries like "mov,mp4,m4a" list several names for one muxer
+            muxers.extend(parts[1].split(','))
+    return muxers
+
+def _parse_hwaccel_list(output):
+    lines = [l.strip() for l in output.splitlines() if l.strip()]
+    return [l for l in lines if not l.endswith(':')]
+
+def _detect_hardware():
     try:
         lspci = subprocess.check_output(['lspci'], encoding='utf-8', stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
         lspci_up = lspci.upper()
@@ -111,22 +432,84 @@ def get_hardware_info():
         pass
     return "unknown"
 
-def get_all_encoders():
+def _build_capabilities(key):
+    return {
+        "key": key,
+        "encoders": _parse_codec_list(_ffmpeg_list('-encoders')),
+        "decoders": _parse_codec_list(_ffmpeg_list('-decoders')),
+        "filters": _parse_filter_list(_ffmpeg_list('-filters')),
+        "muxers": _parse_muxer_list(_ffmpeg_list('-muxers')),
+        "hwaccels": _parse_hwaccel_list(_ffmpeg_list('-hwaccels')),
+        "hardware": _detect_hardware(),
+    }
+
+def _empty_capabilities():
+    return {"key": None, "encoders": {}, "decoders": {}, "filters": [], "muxers": [], "hwaccels": [], "hardware": "unknown"}
+
+def _finalize_capabilities(caps):
+    # Sets for O(1) membership; JSON only round-trips lists
+    for k in ("filters", "muxers", "hwaccels"):
+        caps[k] = set(caps.get(k) or [])
+    return caps
+
+def _load_capabilities(key, log_func=None):
+    # Caller holds _caps_lock
+    global _caps
+    if key is None:
+        _caps = _finalize_capabilities(_empty_capabilities())
+        return _caps
+    caps = _build_capabilities(key)
+    save_json_cache(get_cache_path("ffmpeg_caps.json"), caps)
+    _caps = _finalize_capabilities(caps)
+    if log_func: log_func(f"🔎 FFmpeg capabilities indexed ({len(_caps['encoders'])} encoders, {len(_caps['filters'])} filters)")
+    return _caps
+
+def _current_binary_key(log_func=None):
     try:
-        output = subprocess.check_output(['ffmpeg', '-encoders'], encoding='utf-8', stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
-        encoders = []
-        for line in output.split('\n'):
-            if line.strip().startswith('V'):
-                parts = line.split()
-                if len(parts) >= 2:
-                    encoders.append(parts[1])
-        return sorted(list(set(encoders)))
-    except:
-        return []
+        return _ffmpeg_binary_key()
+    except Exception as e:
+        if log_func: log_func(f"⚠️ Could not inspect ffmpeg: {e}")
+        return None
+
+def refresh_capabilities(log_func=None):
+    """Rebuild the capability table from the current ffmpeg binary and persist it."""
+    with _caps_lock:
+        caps = _load_capabilities(_current_binary_key(log_func), log_func)
+    # Hardware verdicts may be stale too (new driver, new GPU)
+    clear_smoke_verdicts()
+    return caps
+
+def get_capabilities():
+    """Return the capability table, loading it from disk (or building it) on first use."""
+    global _caps
+    if _caps is not None:
+        return _caps
+    with _caps_lock:
+        if _caps is not None:
+            return _caps
+        key = _current_binary_key()
+        cached = load_json_cache(get_cache_path("ffmpeg_caps.json"))
+        if key is not None and cached and cached.get("key") == key:
+            _caps = _finalize_capabilities(cached)
+            return _caps
+        return _load_capabilities(key)
+
+def has_encoder(name):
+    return name in get_capabilities()["encoders"]
+
+def has_filter(name):
+    return name in get_capabilities()["filters"]
+
+def get_hardware_info():
+    return get_capabilities()["hardware"]
+
+def get_all_encoders():
+    encoders = get_capabilities()["encoders"]
+    return sorted(name for name, kind in encoders.items() if kind == 'V')
 
 def get_encoder(codec_choice, use_gpu, log_func=print):
     try:
-        output = subprocess.check_output(['ffmpeg', '-encoders'], encoding='utf-8', stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
+        encoders = get_capabilities()["encoders"]
         is_linux = platform.system().lower() == "linux"
         
         if use_gpu:
@@ -172,7 +555,7 @@ def get_encoder(codec_choice, use_gpu, log_func=print):
             if codec_choice in codec_map:
                 candidates = codec_map[codec_choice].get(hw, codec_map[codec_choice]["unknown"])
                 for enc in candidates:
-                    if enc in output: return enc
+                    if enc in encoders: return enc
             
             log_func(f"⚠️ GPU encoder for {codec_choice} requested but no compatible hardware found. Falling back to software.")
         
@@ -202,29 +585,236 @@ def get_encoder(codec_choice, use_gpu, log_func=print):
         if codec_choice in fallbacks:
             return fallbacks[codec_choice]
             
-        if f" {codec_choice} " in output or codec_choice in output.split():
+        if codec_choice in encoders:
             return codec_choice
             
         return None
     except:
         return None
 
+# --- Hardware Encoder Smoke Test ---
+# A broken GPU driver usually only shows up once ffmpeg opens the encoder. Encoding a few
+# synthetic frames with the exact encoder/filter/hw_init combination finds that out in well
+# under a second, so a bad hardware path is skipped before a full decode is spent on it.
+
+HW_ENCODER_TAGS = ['nvenc', 'amf', 'vaapi', 'qsv']
+SMOKE_TEST_FRAMES = 5
+SMOKE_TEST_TIMEOUT = 15
+# Only passes are written to disk. A failure is often transient (sessions held by another
+# app, a slow driver init, a GPU that shows up after a reboot), so it is only remembered
+# in memory for this long before the encoder gets another try.
+SMOKE_FAILURE_TTL = 300
+
+_smoke_verdicts = None
+_smoke_failures = {}  # signature -> time of the failed test
+_smoke_lock = threading.Lock()
+
+def is_hw_encoder(v_enc):
+    return bool(v_enc) and any(x in v_enc for x in HW_ENCODER_TAGS)
+
+RATE_ARGS = {'-b:v', '-maxrate', '-minrate', '-bufsize'}
+
+def _strip_bitrate_args(enc_args):
+    # The target bitrate changes per file but never decides whether the encoder opens
+    args = []
+    skip = False
+    for a in enc_args:
+        if skip:
+            skip = False
+            continue
+        if a in RATE_ARGS:
+            skip = True
+            continue
+        args.append(a)
+    return args
+
+def _smoke_filter_key(v_filter):
+    # Only the pixel format and the upload to hardware decide whether the encoder opens;
+    # scaling, denoise and fps change with every rung and file
+    return [f for f in (v_filter or "").split(',') if f.startswith('format=') or f == 'hwupload']
+
+def _smoke_signature(v_enc, v_filter, enc_args, hw_init):
+    sig = json.dumps([v_enc, _smoke_filter_key(v_filter), _strip_bitrate_args(enc_args), hw_init])
+    return hashlib.sha1(sig.encode('utf-8')).hexdigest()
+
+def _load_smoke_verdicts():
+    # Caller holds _smoke_lock. Verdicts are only trusted for the same ffmpeg binary.
+    global _smoke_verdicts
+    if _smoke_verdicts is None:
+        cached = load_json_cache(get_cache_path("encoder_smoke.json"))
+        key = get_capabilities()["key"]
+        if cached and cached.get("key") == key:
+            # Older caches also stored failures; those are not trusted across sessions
+            _smoke_verdicts = {sig: True for sig, ok in cached.get("verdicts", {}).items() if ok}
+        else:
+            _smoke_verdicts = {}
+    return _smoke_verdicts
+
+def clear_smoke_verdicts():
+    """Forget cached verdicts (e.g. after a driver update)."""
+    global _smoke_verdicts
+    with _smoke_lock:
+        _smoke_verdicts = {}
+        _smoke_failures.clear()
+        save_json_cache(get_cache_path("encoder_smoke.json"), {"key": get_capabilities()["key"], "verdicts": {}})
+
+def smoke_test_encoder(v_enc, v_filter="format=yuv420p", enc_args=None, hw_init=None, log_func=None):
+    """
+    Encode a handful of `testsrc` frames with the given encoder setup and return True if
+    ffmpeg succeeded. Passes are cached on disk per encoder, pixel format, hw_init and
+    non-rate encoder args (not per resolution); failures only in memory, for
+    SMOKE_FAILURE_TTL seconds.
+    """
+    enc_args = enc_args if enc_args is not None else ['-c:v', v_enc]
+    hw_init = hw_init or []
+    if v_enc not in get_capabilities()["encoders"]:
+        return False
+
+    sig = _smoke_signature(v_enc, v_filter, enc_args, hw_init)
+    with _smoke_lock:
+        verdicts = _load_smoke_verdicts()
+        if sig in verdicts:
+            return True
+        failed_at = _smoke_failures.get(sig)
+        if failed_at is not None and time.time() - failed_at < SMOKE_FAILURE_TTL:
+            return False
+
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error'] + hw_init + \
+          ['-f', 'lavfi', '-i', 'testsrc=size=1280x720:rate=30', '-frames:v', str(SMOKE_TEST_FRAMES),
+           '-vf', v_filter] + _strip_bitrate_args(enc_args) + ['-an', '-f', 'null', '-']
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=SMOKE_TEST_TIMEOUT, creationflags=SUBPROCESS_FLAGS)
+        ok = result.returncode == 0
+        if not ok and log_func:
+            err = result.stderr.strip().splitlines()
+            log_func(f"⚠️ {v_enc} failed its smoke test: {err[-1] if err else 'exit code ' + str(result.returncode)}")
+    except Exception as e:
+        ok = False
+        if log_func: log_func(f"⚠️ {v_enc} failed its smoke test: {e}")
+
+    with _smoke_lock:
+        if ok:
+            _smoke_failures.pop(sig, None)
+            verdicts = _load_smoke_verdicts()
+            verdicts[sig] = True
+            save_json_cache(get_cache_path("encoder_smoke.json"), {"key": get_capabilities()["key"], "verdicts": verdicts})
+        else:
+            _smoke_failures[sig] = time.time()
+    return ok
+
+def _default_hw_init(v_enc):
+    return ['-vaapi_device', '/dev/dri/renderD128'] if 'vaapi' in v_enc else []
+
+def _default_smoke_filter(v_enc):
+    return "format=nv12,hwupload" if 'vaapi' in v_enc else "format=yuv420p"
+
+def hw_encoder_args(v_enc):
+    """Encoder args every hardware encode adds on top of `-c:v` and the bitrate."""
+    if 'nvenc' in v_enc:
+        return ['-preset', 'p7', '-tune', 'hq']
+    return []
+
+def hw_encoder_usable(v_enc, log_func=None):
+    """Smoke test `v_enc` as a default 8-bit compression encode would use it."""
+    return smoke_test_encoder(v_enc, _default_smoke_filter(v_enc), ['-c:v', v_enc] + hw_encoder_args(v_enc),
+                              _default_hw_init(v_enc), log_func)
+
+def check_hardware_encoders(log_func=None):
+    """Smoke test every hardware encoder this ffmpeg build ships. Returns {encoder: available}."""
+    encoders = get_capabilities()["encoders"]
+    report = {}
+    for enc in sorted(e for e, kind in encoders.items() if kind == 'V' and is_hw_encoder(e)):
+        report[enc] = hw_encoder_usable(enc, log_func)
+    return report
+
 # --- Compression & Conversion Features ---
 
-def compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, log_func=print, stop_event=None, preview_path=None, progress_callback=None, advanced_params=None):
-    if stop_event and stop_event.is_set(): return False
+def target_video_kbps(target_mb, duration):
+    """Video bitrate budget for a target size, leaving 10% headroom and room for audio."""
+    return max(int(((target_mb * 8192 * 0.9) / duration) - 64), 50)
+
+# --- Resolution Ladder ---
+
+DEFAULT_RES_LADDER = [2160, 1440, 1080, 720, 480, 360, 240]
+
+# Lowest bits-per-pixel at which each codec still gives watchable output.
+# Rungs below the floor would only produce a blocky mess, so they are not attempted.
+BPP_FLOORS = {
+    "h264": 0.04,
+    "h265": 0.025,
+    "av1": 0.018,
+    "h266": 0.015,
+    "vp9": 0.025,
+    "vp8": 0.05,
+}
+DEFAULT_BPP_FLOOR = 0.06
 
-    duration = get_video_duration(input_file, log_func)
+# Rough cost of one intra frame in bits per pixel and the GOP length most encoders default
+# to. Used to spot rungs where the keyframes alone would blow a short clip's budget.
+KEYFRAME_BPP = 0.15
+TYPICAL_GOP_SECONDS = 10
+
+def build_resolution_ladder(info, target_mb, codec, res_min=None, res_max=None, fps_override=None, log_func=print):
+    """
+    Build the auto-mode resolution list for a source. Rungs above the source height are
+    dropped (never upscale), as are rungs whose bits-per-pixel at the target bitrate falls
+    below the codec's floor or whose keyframes alone cannot fit the budget.
+    """
+    res_list = [r for r in DEFAULT_RES_LADDER if (res_max is None or r <= res_max) and (res_min is None or r >= res_min)]
+    if not res_list:
+        # Fallback if user set an impossible range
+        res_list = [1080, 720, 480, 360]
+
+    display = get_display_size(info)
+    if display is None or not info.duration:
+        return res_list
+    src_w, src_h = display
+
+    capped = [r for r in res_list if r <= src_h]
+    # A non-standard source height (e.g. 900p) is the best rung that does not upscale
+    if src_h not in capped and (res_max is None or src_h <= res_max) and (res_min is None or src_h >= res_min) \
+            and (not capped or src_h > capped[0]) and src_h < DEFAULT_RES_LADDER[0]:
+        capped.insert(0, src_h)
+    if not capped:
+        capped = [min(res_list[-1], src_h)]
+
+    fps = _to_float(fps_override) or info.fps or 30
+    video_kbps = target_video_kbps(target_mb, info.duration)
+    budget_bits = video_kbps * 1000 * info.duration
+    floor = BPP_FLOORS.get(codec, DEFAULT_BPP_FLOOR)
+    keyframes = max(1, int(info.duration // TYPICAL_GOP_SECONDS) + 1)
+
+    viable = []
+    for r in capped:
+        pixels = (r * src_w / src_h) * r
+        bpp = video_kbps * 1000 / (pixels * fps)
+        keyframe_bits = keyframes * pixels * KEYFRAME_BPP
+        if bpp >= floor and keyframe_bits < budget_bits:
+            viable.append(r)
+
+    if not viable:
+        viable = capped[-1:]
+    if len(viable) < len(res_list):
+        log_func(f"📐 Source is {src_w}x{src_h}, trying {', '.join(f'{r}p' for r in viable)}")
+    return viable
+
+def build_video_encode(input_file, target_mb, res, codec, use_gpu, log_func=print, advanced_params=None, duration=None):
+    """
+    Resolve the encoder, filter chain and encoder args for one attempt at `res`.
+    Returns a dict describing the video encode, or None if it cannot be set up.
+    """
+    if duration is None:
+        duration = get_video_duration(input_file, log_func)
     if duration is None or duration <= 0:
         log_func(f"❌ Error getting duration for {input_file}")
-        return False
+        return None
     
-    video_kbps = max(int(((target_mb * 8192 * 0.9) / duration) - 64), 50)
+    video_kbps = target_video_kbps(target_mb, duration)
     
     v_enc = get_encoder(codec, use_gpu, log_func)
     if not v_enc:
         log_func(f"❌ Error: No encoder found for {codec}")
-        return False
+        return None
 
     if v_enc == "h261":
         res = min(res, 288)
@@ -233,12 +823,7 @@ def compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, lo
         res = min(res, 480) 
         video_kbps = min(video_kbps, 2000)
     
-    mode_str = "GPU" if use_gpu and any(x in v_enc for x in ['nvenc', 'amf', 'vaapi', 'qsv']) else "Software"
-    log_func(f"\n--- ENCODING: {v_enc.upper()} ({mode_str}) | {res}p | Target: {video_kbps}kbps ---")
-
-    hw_init = []
-    if 'vaapi' in v_enc:
-        hw_init = ['-vaapi_device', '/dev/dri/renderD128']
+    hw_init = _default_hw_init(v_enc)
 
     if isinstance(res, str) and "x" in res.lower():
         try:
@@ -319,9 +904,26 @@ def compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, lo
             if advanced_params.get("aq"):
                 enc_args.extend(['-aq-mode', '3'])
 
-    if 'nvenc' in v_enc:
-        enc_args.extend(['-preset', 'p7', '-tune', 'hq'])
+    enc_args.extend(hw_encoder_args(v_enc))
     
+    legacy_encoders = ['h261', 'h263', 'roqvideo', 'snow', 'cinepak', 'msmpeg4v2', 'libxvid', 'flv', 'smc', 'wmv3']
+    is_legacy = any(le in v_enc for le in legacy_encoders)
+    if is_legacy:
+        enc_args.extend(['-strict', '-2'])
+
+    return {
+        "v_enc": v_enc,
+        "res": res,
+        "video_kbps": video_kbps,
+        "duration": duration,
+        "hw_init": hw_init,
+        "v_filter": v_filter,
+        "enc_args": enc_args,
+        "is_legacy": is_legacy,
+    }
+
+def build_audio_args(advanced_params=None):
+    """Return (audio_args, a_filter_args) for the compressor's audio track."""
     audio_codec_choice = advanced_params.get("audio_codec", "aac") if advanced_params else "aac"
     if not audio_codec_choice:
         audio_codec_choice = "aac"
@@ -345,145 +947,854 @@ def compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, lo
     if audio_filters:
         a_filter_args = ['-af', ",".join(audio_filters)]
 
-    legacy_encoders = ['h261', 'h263', 'roqvideo', 'snow', 'cinepak', 'msmpeg4v2', 'libxvid', 'flv', 'smc', 'wmv3']
-    is_legacy = any(le in v_enc for le in legacy_encoders)
-    if is_legacy:
-        enc_args.extend(['-strict', '-2'])
+    return audio_args, a_filter_args
 
-    prev_process = None
-    if preview_path:
-        prev_cmd = [
-            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', input_file,
-            '-vf', 'fps=1,scale=480:-1', '-update', '1', '-q:v', '2', preview_path
-        ]
+def build_meta_args(advanced_params=None):
+    strip_meta = advanced_params.get("strip_metadata", False) if advanced_params else False
+    meta_args = ['-map_metadata', '-1'] if strip_meta else []
+    
+    # Custom Metadata
+    if not strip_meta and advanced_params:
+        m_title = advanced_params.get("meta_title", "")
+        m_author = advanced_params.get("meta_author", "")
+        if m_title: meta_args += ['-metadata', f"title={m_title}"]
+        if m_author: meta_args += ['-metadata', f"author={m_author}", '-metadata', f"artist={m_author}"]
+    return meta_args
+
+# --- Keyframe Index ---
+# Keyframe timestamps of the first video stream, streamed once per file from the packet
+# headers (nothing is decoded) and stored on disk as packed array('d') columns keyed by the
+# file's fingerprint. Lookups are bisects, so even hours of content snap instantly.
+# Each keyframe's DTS is kept next to its PTS: with B-frames the two differ, and the concat
+# demuxer's outpoint is compared against DTS.
+
+KEYFRAME_CACHE_MAX_BYTES = 64 * 1024 ** 2
+
+class KeyframeIndex:
+    """Sorted keyframe times (seconds, PTS) of one file, with each keyframe's DTS alongside."""
+    def __init__(self, times=None, dts=None):
+        self.times = times if times is not None else array('d')
+        self.dts = dts if dts is not None else array('d', self.times)
+
+    def __len__(self):
+        return len(self.times)
+
+    def before(self, t):
+        """Last keyframe at or before `t`, or None."""
+        i = bisect.bisect_right(self.times, t)
+        return self.times[i - 1] if i else None
+
+    def after(self, t):
+        """First keyframe at or after `t`, or None."""
+        i = bisect.bisect_left(self.times, t)
+        return self.times[i] if i < len(self.times) else None
+
+    def nearest(self, t):
+        """Keyframe closest to `t`, or `t` itself if there are none."""
+        candidates = [k for k in (self.before(t), self.after(t)) if k is not None]
+        return min(candidates, key=lambda k: abs(k - t)) if candidates else t
+
+    def between(self, start, end):
+        """Keyframes in [start, end)."""
+        return self.times[bisect.bisect_left(self.times, start):bisect.bisect_left(self.times, end)]
+
+    def dts_at(self, t):
+        """DTS of the keyframe whose PTS is `t` (`t` itself if no keyframe is there)."""
+        i = bisect.bisect_left(self.times, t)
+        if i < len(self.times) and self.times[i] == t:
+            return self.dts[i]
+        return t
+
+def _keyframe_cache_path(fingerprint):
+    key = hashlib.sha1(repr(fingerprint).encode()).hexdigest()
+    # File layout: all PTS values, then the matching DTS values
+    return get_cache_path("keyframes", key + ".kf2")
+
+def _scan_keyframes(path):
+    """Stream keyframe packet times from ffprobe into PTS-sorted (pts, dts) array('d') columns."""
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,dts_time,flags",
+           "-of", "csv=p=0", path]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True, bufsize=1, creationflags=SUBPROCESS_FLAGS)
+    pairs = []
+    for line in process.stdout:
+        fields = line.strip().split(',')
+        if len(fields) < 3 or 'K' not in fields[2]:
+            continue
+        pts = _to_float(fields[0])
+        if pts is not None:
+            pairs.append((pts, _to_float(fields[1], pts)))
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(stderr.strip())
+    # Packets come in decode order
+    pairs.sort()
+    return array('d', (pts for pts, _ in pairs)), array('d', (dts for _, dts in pairs))
+
+_keyframe_scan_locks = {}  # fingerprint -> Lock held while that file's index is built
+_keyframe_scan_locks_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=64)
+def _keyframe_index_fingerprint(fingerprint):
+    # lru_cache doesn't stop concurrent misses from all running; the per-file lock makes
+    # late callers wait for the first scan and then read its result from disk
+    with _keyframe_scan_locks_lock:
+        lock = _keyframe_scan_locks.setdefault(fingerprint, threading.Lock())
+    try:
+        with lock:
+            return _load_or_scan_keyframes(fingerprint)
+    finally:
+        with _keyframe_scan_locks_lock:
+            _keyframe_scan_locks.pop(fingerprint, None)
+
+def _load_or_scan_keyframes(fingerprint):
+    cache_path = _keyframe_cache_path(fingerprint)
+    try:
+        packed = array('d')
+        with open(cache_path, 'rb') as f:
+            packed.frombytes(f.read())
+        if len(packed) % 2 == 0:
+            half = len(packed) // 2
+            touch_cache_file(cache_path)
+            return KeyframeIndex(packed[:half], packed[half:])
+    except (OSError, ValueError):
+        pass
+
+    times, dts = _scan_keyframes(fingerprint[0])
+    try:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            (times + dts).tofile(f)
+        os.replace(tmp_path, cache_path)
+        prune_cache_dir(os.path.dirname(cache_path), KEYFRAME_CACHE_MAX_BYTES)
+    except OSError:
+        pass
+    return KeyframeIndex(times, dts)
+
+def get_keyframe_index(path):
+    """KeyframeIndex of the first video stream (empty if unknown). Built once per file version."""
+    try:
+        return _keyframe_index_fingerprint(file_fingerprint(path))
+    except:
+        return KeyframeIndex()
+
+def get_keyframe_times(path):
+    """Sorted keyframe timestamps of the first video stream (empty if unknown)."""
+    return get_keyframe_index(path).times
+
+# --- Chunked Parallel Encoding ---
+# Software encoders rarely scale past 8-16 threads. On big machines the input is split
+# into time ranges (snapped to source keyframes so each chunk seeks cheaply), every chunk
+# is encoded by its own ffmpeg at the same bitrate, and the results are joined with the
+# concat demuxer in stream-copy mode.
+
+CHUNKED_ENCODERS = {"libx264", "libx265", "libvpx-vp9", "libaom-av1"}
+CHUNK_THREADS = 8  # Encoder threads per chunk
+CHUNK_MIN_SECONDS = 30
+CHUNK_MIN_CPUS = 16
+
+
+def chunk_count(duration, cpus=None):
+    cpus = cpus or os.cpu_count() or 1
+    return max(1, min(cpus // CHUNK_THREADS, int(duration // CHUNK_MIN_SECONDS)))
+
+def should_encode_chunked(plan, advanced_params=None, cpus=None):
+    """`cpus` is this encode's share of the machine (all of it by default)."""
+    if advanced_params and advanced_params.get("chunked") is False:
+        return False
+    if plan["v_enc"] not in CHUNKED_ENCODERS or plan["is_legacy"]:
+        return False
+    cpus = cpus or os.cpu_count() or 1
+    if cpus < CHUNK_MIN_CPUS:
+        return False
+    return chunk_count(plan["duration"], cpus) > 1
+
+def plan_chunks(input_file, duration, count):
+    """Split [0, duration) into `count` ranges, snapping each cut to the nearest source keyframe."""
+    keyframes = get_keyframe_index(input_file)
+    cuts = []
+    for i in range(1, count):
+        t = keyframes.nearest(duration * i / count)
+        if (not cuts or t > cuts[-1] + 1) and 0 < t < duration - 1:
+            cuts.append(t)
+    bounds = [0.0] + cuts + [duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _default_audio_map(info, input_idx):
+    """-map args for the audio stream ffmpeg would pick without -map (most channels, first on ties)."""
+    streams = [st for st in (info.streams if info else []) if st.get("codec_type") == "audio"]
+    if not streams:
+        return []
+    best = max(streams, key=lambda st: (st.get("channels") or 0, -st.get("index", 0)))
+    return ['-map', f"{input_idx}:{best.get('index', 0)}"]
+
+def _format_hms(secs):
+    m, s = divmod(int(max(secs, 0)), 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+def encode_chunked(input_file, output_file, plan, audio_args, a_filter_args, meta_args, two_pass=False,
+                   log_func=print, stop_event=None, progress_callback=None, shared_audio=None, preview=None,
+                   target_mb=None, attempt_stats=None, cpus=None):
+    """
+    Encode `plan` as parallel chunks and join them with the concat demuxer.
+    Returns True on success, False on failure, or OVERSHOOT when the summed chunk output
+    was projected to miss `target_mb`. Progress is reported as one aggregate over all chunks.
+    The chunks share `cpus` cores between them (all of the machine's by default).
+    """
+    duration = plan["duration"]
+    cpus = cpus or os.cpu_count() or 1
+    chunks = plan_chunks(input_file, duration, chunk_count(duration, cpus))
+    threads = max(1, cpus // len(chunks))
+    log_func(f"🧩 Chunked encode: {len(chunks)} chunks x {threads} threads")
+
+    thread_args = ['-threads', str(threads)]
+    if plan["v_enc"] == "libx265":
+        thread_args += ['-x265-params', f"pools={threads}"]
+    elif plan["v_enc"] == "libvpx-vp9":
+        thread_args += ['-row-mt', '1']
+
+    tmp_dir = tempfile.mkdtemp(prefix="chunked_encode_")
+    done_secs = [0.0] * len(chunks)
+    chunk_fps = [0.0] * len(chunks)
+    progress_lock = threading.Lock()
+    start_time = time.time()
+    failed = threading.Event()
+    passes = [1, 2] if two_pass else [0]
+
+    # Chunks are video-only, so the audio muxed at the join counts on top of their output
+    if shared_audio:
+        audio_mb = shared_audio.estimated_mb
+    else:
+        audio_mb = estimate_audio_kbps(audio_args, probe(input_file)) * 1000 / 8 * duration / 1048576
+    monitor = OvershootMonitor(output_file, target_mb, duration, audio_mb) if target_mb else None
+    out_secs = [0.0] * len(chunks)
+    out_bytes = [0] * len(chunks)
+    overshoot = threading.Event()
+
+    def check_overshoot(idx, secs, written_bytes):
+        """Project the final size from all chunks' output so far, as if it were one encode."""
+        with progress_lock:
+            out_secs[idx] = secs
+            out_bytes[idx] = written_bytes
+            if monitor and not overshoot.is_set() and monitor.should_abort(sum(out_secs), sum(out_bytes)):
+                overshoot.set()
+                failed.set()
+
+    def report(idx, secs, fps_val):
+        with progress_lock:
+            done_secs[idx] = secs
+            chunk_fps[idx] = fps_val
+            total = sum(done_secs) / len(passes)
+            pct = min(total / duration, 1.0) if duration > 0 else 0
+            elapsed = time.time() - start_time
+            rem = elapsed / pct - elapsed if pct > 0 else 0
+            if progress_callback:
+                progress_callback({
+                    "res": plan["res"],
+                    "pct": pct,
+                    "fps": f"{sum(chunk_fps):.1f}",
+                    "rem_time": _format_hms(rem)
+                })
+
+    def encode_chunk(idx):
+        start, end = chunks[idx]
+        chunk_out = os.path.join(tmp_dir, f"chunk_{idx:04d}.mkv")
+        passlog = os.path.join(tmp_dir, f"pass_{idx:04d}")
+        seek_args = ['-ss', f"{start:.6f}", '-t', f"{end - start:.6f}", '-i', input_file]
+        chunk_len = end - start
+        for p in passes:
+            if stop_event and stop_event.is_set():
+                return None
+            pass_args = [] if p == 0 else ['-pass', str(p), '-passlogfile', passlog]
+            out_args = ['-an', '-f', 'null', os.devnull] if p == 1 else ['-an', '-f', 'matroska', chunk_out]
+            # Chunks run side by side and finish together, so the first one can carry the preview
+            if idx == 0 and preview is not None:
+                out_args = out_args + preview_output_args(preview)
+            cmd = ['ffmpeg', '-y', '-hide_banner'] + plan["hw_init"] + seek_args + \
+                  ['-vf', plan["v_filter"]] + plan["enc_args"] + thread_args + pass_args + out_args
+            pass_base = chunk_len if p == 2 else 0
+
+            def on_chunk_progress(prog, p=p, pass_base=pass_base):
+                report(idx, pass_base + min(prog.secs, chunk_len), prog.fps)
+                # Pass 1 writes no output, so there is nothing to project
+                if p != 1:
+                    check_overshoot(idx, min(prog.secs, chunk_len), prog.total_size)
+                # One failed chunk sinks the whole encode, so stop the others early
+                return failed.is_set()
+
+            returncode, _ = run_ffmpeg(cmd, on_chunk_progress, stop_event, preview if idx == 0 else None)
+            if returncode != 0:
+                failed.set()
+                return None
+        report(idx, chunk_len * len(passes), 0.0)
+        return chunk_out
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(encode_chunk, range(len(chunks))))
+
+        if stop_event and stop_event.is_set():
+            log_func("🛑 Process stopped by user.")
+            return False
+        if overshoot.is_set():
+            log_func(f"✂️ Projected {monitor.projected_mb:.2f} MB (target {target_mb:.2f} MB) "
+                     f"at {_format_hms(sum(out_secs))}, abandoning {plan['res']}p early.")
+            if attempt_stats is not None:
+                attempt_stats["projected_mb"] = monitor.projected_mb
+            return OVERSHOOT
+        if any(r is None for r in results):
+            log_func("❌ One or more chunks failed to encode.")
+            return False
+
+        concat_list = os.path.join(tmp_dir, "chunks.txt")
+        write_concat_list(results, concat_list)
+
+        log_func(f"🔗 Joining {len(results)} chunks...", replace_last=True)
+        audio_path = shared_audio.wait() if shared_audio else None
+        if audio_path:
+            cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                   '-f', 'concat', '-safe', '0', '-i', concat_list, '-i', audio_path, '-i', input_file,
+                   '-map', '0:v:0', '-map', '1:a', '-c', 'copy']
+            cmd += ([] if '-map_metadata' in meta_args else ['-map_metadata', '2']) + meta_args + [output_file]
+        else:
+            cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                   '-f', 'concat', '-safe', '0', '-i', concat_list, '-i', input_file,
+                   '-map', '0:v:0'] + _default_audio_map(probe(input_file), 1) + ['-c:v', 'copy'] + audio_args + a_filter_args + meta_args + [output_file]
+        result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
+        if result.returncode != 0:
+            log_func(f"❌ Joining chunks failed:\n{result.stderr[-500:]}")
+            return False
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# --- Early Overshoot Abort ---
+# While an attempt runs, the growing output file is compared against how much of the input
+# has been encoded. Once the extrapolated final size is clearly over the target for several
+# consecutive checks, the attempt is killed and auto_compress moves to the next rung.
+# `-fs` caps the output as a backstop. A capped file is truncated, not just large, so it is
+# deleted and reported as OVERSHOOT rather than kept as an (oversized) result.
+
+OVERSHOOT = "overshoot"  # compress_attempt result when the encode was abandoned early
+EARLY_ABORT_MIN_SECS = 30  # Media seconds encoded before projections are trusted
+EARLY_ABORT_MIN_FRACTION = 0.05
+EARLY_ABORT_MARGIN = 1.15  # Projection must exceed target by this factor...
+EARLY_ABORT_CONFIRMATIONS = 3  # ...on this many consecutive checks
+EARLY_ABORT_CHECK_INTERVAL = 1.0  # Wall-clock seconds between output size checks
+FS_CAP_FACTOR = 1.25
+
+class OvershootMonitor:
+    """Projects the final output size of a running encode from its partial output."""
+    def __init__(self, output_file, target_mb, duration, extra_mb=0.0):
+        self.output_file = output_file
+        self.target_mb = target_mb
+        self.duration = duration
+        self.extra_mb = extra_mb  # Size added after this file is written (e.g. audio muxed later)
+        self.strikes = 0
+        self.projected_mb = None
+        self._last_check = 0.0
+
+    def should_abort(self, current_secs, written_bytes=None):
+        """`written_bytes` is ffmpeg's own total_size; without it the file is stat'ed."""
+        now = time.time()
+        if now - self._last_check < EARLY_ABORT_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        if current_secs < max(EARLY_ABORT_MIN_SECS, self.duration * EARLY_ABORT_MIN_FRACTION):
+            return False
+        if written_bytes:
+            written_mb = written_bytes / 1048576
+        else:
+            try:
+                written_mb = os.path.getsize(self.output_file) / 1048576
+            except OSError:
+                return False
+        self.projected_mb = written_mb * self.duration / current_secs + self.extra_mb
+        if self.projected_mb > self.target_mb * EARLY_ABORT_MARGIN:
+            self.strikes += 1
+        else:
+            self.strikes = 0
+        return self.strikes >= EARLY_ABORT_CONFIRMATIONS
+
+def fs_cap_bytes(target_mb):
+    return int(target_mb * FS_CAP_FACTOR * 1048576)
+
+def fs_cap_args(target_mb):
+    return ['-fs', str(fs_cap_bytes(target_mb))]
+
+# --- Shared Audio Track ---
+# Every rung of the ladder (and pass 2) used to re-decode, re-filter and re-encode the same
+# audio. Instead the audio is encoded once per job in the background, while the first video
+# attempt runs; attempts then encode video only and mux the cached track with -c:a copy.
+
+class SharedAudioTrack:
+    """One job's processed audio, encoded once in a background thread."""
+    def __init__(self, input_file, audio_args, a_filter_args, log_func=print, stop_event=None):
+        self.input_file = input_file
+        self.audio_args = audio_args
+        self.a_filter_args = a_filter_args
+        self.log_func = log_func
+        self.stop_event = stop_event
+        self.tmp_dir = tempfile.mkdtemp(prefix="shared_audio_")
+        self.path = os.path.join(self.tmp_dir, "audio.mka")
+        self.ok = False
+        self._done = threading.Event()
+
+        info = probe(input_file)
+        duration = info.duration if info and info.duration else 0
+        self.estimated_mb = estimate_audio_kbps(audio_args, info) * 1000 / 8 * duration / 1048576
+
+        threading.Thread(target=self._run, daemon=True).start()
+
+    @staticmethod
+    def is_useful(input_file, audio_args):
+        """Worth caching only when there is audio and it actually gets re-encoded."""
+        info = probe(input_file)
+        return info is not None and bool(info.a_codec) and audio_args != ['-c:a', 'copy']
+
+    def _run(self):
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', self.input_file,
+               '-vn', '-sn', '-dn'] + self.audio_args + self.a_filter_args + ['-f', 'matroska', self.path]
         try:
-            prev_process = subprocess.Popen(prev_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAGS)
-            log_func(f"📸 Preview generator started for: {os.path.basename(preview_path)}")
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
+            while process.poll() is None:
+                if self.stop_event and self.stop_event.is_set():
+                    process.terminate()
+                    process.wait()
+                    break
+                time.sleep(0.2)
+            self.ok = process.returncode == 0 and os.path.exists(self.path)
+            if self.ok:
+                self.estimated_mb = os.path.getsize(self.path) / 1048576
         except Exception as e:
-            log_func(f"⚠️ Failed to start preview generator: {e}")
+            self.log_func(f"⚠️ Audio pre-encode failed: {e}")
+        finally:
+            self._done.set()
+
+    def wait(self):
+        """Block until the audio is ready. Returns its path, or None if it failed."""
+        while not self._done.wait(0.2):
+            if self.stop_event and self.stop_event.is_set():
+                return None
+        return self.path if self.ok else None
+
+    def video_path(self, output_file):
+        """Temp path for a video-only attempt, in the same container as the final output."""
+        return os.path.join(self.tmp_dir, "video" + os.path.splitext(output_file)[1])
+
+    def mux(self, video_file, output_file, meta_args, log_func=print):
+        """Combine a video-only attempt with the cached audio into `output_file`."""
+        audio_path = self.wait()
+        if self.stop_event and self.stop_event.is_set():
+            return False
+        # Global metadata still comes from the source unless the user stripped it
+        meta_map = [] if '-map_metadata' in meta_args else ['-map_metadata', '2']
+        if audio_path:
+            cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', video_file, '-i', audio_path, '-i', self.input_file,
+                   '-map', '0:v', '-map', '1:a', '-c', 'copy'] + meta_map + meta_args + [output_file]
+        else:
+            log_func("⚠️ Cached audio unavailable, encoding audio during mux.")
+            cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', video_file, '-i', self.input_file, '-i', self.input_file,
+                   '-map', '0:v', '-map', '1:a?', '-c:v', 'copy'] + self.audio_args + self.a_filter_args + meta_map + meta_args + [output_file]
+        result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
+        try: os.remove(video_file)
+        except: pass
+        if result.returncode != 0:
+            log_func(f"❌ Muxing audio failed:\n{result.stderr[-500:]}")
+            return False
+        return True
+
+    def cleanup(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+# --- Live Preview ---
+# Preview frames are an extra mjpeg output of the encode itself, streamed over stdout and
+# split into JPEGs as they arrive. The GUI reads the newest one from memory, so nothing
+# touches the disk and there is no half-written file to race against.
+
+PREVIEW_FILTER = "fps=1,scale=480:-2"
+PREVIEW_RING_SIZE = 4
+_JPEG_SOI = b'\xff\xd8'
+_JPEG_EOI = b'\xff\xd9'
+# SOF markers carry the frame size (C4, C8 and CC share the range but are not SOFs)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+PreviewFrame = namedtuple("PreviewFrame", "seq data width height")
+
+def jpeg_dimensions(data):
+    """(width, height) from a JPEG's SOF header without decoding it, or None."""
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+class PreviewFrames:
+    """Bounded ring of the most recent preview JPEGs, filled from an ffmpeg mjpeg pipe."""
+    def __init__(self, maxlen=PREVIEW_RING_SIZE):
+        self.frames = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    def reset(self):
+        with self._cond:
+            self.frames.clear()
+
+    def _push(self, data):
+        size = jpeg_dimensions(data)
+        if size is None:
+            return
+        with self._cond:
+            self._seq += 1
+            self.frames.append(PreviewFrame(self._seq, data, size[0], size[1]))
+            self._cond.notify_all()
+
+    def pump(self, stream):
+        """Split a concatenated JPEG stream into frames until EOF. Runs on its own thread."""
+        buf = bytearray()
+        scan = 0  # Where to resume looking for the end of the current frame
+        try:
+            while True:
+                data = stream.read1(65536)
+                if not data:
+                    break
+                buf += data
+                while True:
+                    start = buf.find(_JPEG_SOI)
+                    if start < 0:
+                        del buf[:-1]
+                        scan = 0
+                        break
+                    end = buf.find(_JPEG_EOI, max(start + 2, scan))
+                    if end < 0:
+                        scan = len(buf) - 1
+                        break
+                    self._push(bytes(buf[start:end + 2]))
+                    del buf[:end + 2]
+                    scan = 0
+        except (OSError, ValueError):
+            pass
+
+    def latest(self):
+        with self._cond:
+            return self.frames[-1] if self.frames else None
+
+    def wait_for(self, after_seq=0, timeout=None):
+        """Newest frame with a sequence number above `after_seq`, or None after `timeout`."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.frames and self.frames[-1].seq > after_seq, timeout)
+            if self.frames and self.frames[-1].seq > after_seq:
+                return self.frames[-1]
+            return None
+
+def preview_output_args(preview):
+    """
+    Extra ffmpeg output that streams 1 fps preview JPEGs to stdout for a PreviewFrames.
+    Appended to an encode command so the preview reuses frames the encode already decodes.
+    """
+    if preview is None:
+        return []
+    return ['-map', '0:v:0', '-vf', PREVIEW_FILTER, '-an', '-sn', '-dn',
+            '-c:v', 'mjpeg', '-q:v', '5', '-f', 'image2pipe', 'pipe:1']
+
+def compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, log_func=print, stop_event=None, preview=None, progress_callback=None, advanced_params=None, attempt_stats=None, shared_audio=None, cpus=None):
+    """
+    Run one encode at `res`. Returns True on success, False on failure, or OVERSHOOT when
+    the encode was abandoned because it was projected to miss `target_mb`
+    (the projection is stored in `attempt_stats["projected_mb"]` if a dict is passed).
+    With a SharedAudioTrack, only video is encoded and the cached audio is muxed in.
+    With a PreviewFrames, the encode also streams preview JPEGs into it.
+    `cpus` limits how many cores a chunked encode may spread over (see JobScheduler).
+    """
+    if stop_event and stop_event.is_set(): return False
+
+    plan = build_video_encode(input_file, target_mb, res, codec, use_gpu, log_func, advanced_params)
+    if plan is None:
+        return False
+    v_enc, res, video_kbps, duration = plan["v_enc"], plan["res"], plan["video_kbps"], plan["duration"]
+    hw_init, v_filter, enc_args, is_legacy = plan["hw_init"], plan["v_filter"], plan["enc_args"], plan["is_legacy"]
+
+    mode_str = "GPU" if use_gpu and is_hw_encoder(v_enc) else "Software"
+    log_func(f"\n--- ENCODING: {v_enc.upper()} ({mode_str}) | {res}p | Target: {video_kbps}kbps ---")
+
+    audio_args, a_filter_args = build_audio_args(advanced_params)
+
+    if is_hw_encoder(v_enc) and not smoke_test_encoder(v_enc, v_filter, enc_args, hw_init, log_func):
+        log_func(f"❌ {v_enc} is not usable on this system, skipping hardware encode.")
+        return False
+
+    preview_args = preview_output_args(preview)
 
     passes = [1, 2] if advanced_params and advanced_params.get("two_pass") and not is_legacy else [0]
-    
+    meta_args = build_meta_args(advanced_params)
+
+    if should_encode_chunked(plan, advanced_params, cpus):
+        return encode_chunked(input_file, output_file, plan, audio_args, a_filter_args, meta_args,
+                              two_pass=(passes != [0]), log_func=log_func, stop_event=stop_event,
+                              progress_callback=progress_callback, shared_audio=shared_audio,
+                              preview=preview, target_mb=target_mb, attempt_stats=attempt_stats, cpus=cpus)
+
+    # Per-attempt pass log so concurrent two-pass jobs never share ffmpeg2pass-0.log in the cwd
+    passlog_dir = tempfile.mkdtemp(prefix="twopass_") if passes != [0] else None
+    pass_args = ['-passlogfile', os.path.join(passlog_dir, "pass")] if passlog_dir else []
+
+    # With a shared audio track the encode is video-only; audio and metadata come in at mux
+    encode_out = shared_audio.video_path(output_file) if shared_audio else output_file
+    enc_tail_args = ['-an'] if shared_audio else audio_args + a_filter_args + meta_args
+
     try:
         for p in passes:
             if stop_event and stop_event.is_set():
-                if prev_process:
-                    try: prev_process.terminate()
-                    except: pass
                 log_func("🛑 Process stopped by user.")
-                try: os.remove(preview_path) if preview_path and os.path.exists(preview_path) else None
-                except: pass
                 return False
             
-            strip_meta = advanced_params.get("strip_metadata", False) if advanced_params else False
-            meta_args = ['-map_metadata', '-1'] if strip_meta else []
-            
-            # Custom Metadata
-            if not strip_meta and advanced_params:
-                m_title = advanced_params.get("meta_title", "")
-                m_author = advanced_params.get("meta_author", "")
-                if m_title: meta_args += ['-metadata', f"title={m_title}"]
-                if m_author: meta_args += ['-metadata', f"author={m_author}", '-metadata', f"artist={m_author}"]
-
             if p == 0:
                 log_func(f"Encoding...", replace_last=True)
-                cur_cmd = ['ffmpeg', '-y', '-hide_banner', '-stats'] + hw_init + ['-i', input_file] + \
-                          ['-vf', v_filter] + enc_args + audio_args + a_filter_args + meta_args + [output_file]
+                cur_cmd = ['ffmpeg', '-y', '-hide_banner'] + hw_init + ['-i', input_file] + \
+                          ['-vf', v_filter] + enc_args + enc_tail_args + fs_cap_args(target_mb) + [encode_out] + preview_args
             elif p == 1:
                 log_func(f"Starting Pass 1...", replace_last=True)
-                cur_cmd = ['ffmpeg', '-y', '-hide_banner', '-stats'] + hw_init + ['-i', input_file] + \
-                          ['-vf', v_filter] + enc_args + ['-pass', '1'] + ['-an', '-f', 'null', '/dev/null']
+                cur_cmd = ['ffmpeg', '-y', '-hide_banner'] + hw_init + ['-i', input_file] + \
+                          ['-vf', v_filter] + enc_args + ['-pass', '1'] + pass_args + ['-an', '-f', 'null', os.devnull] + preview_args
             else:
                 log_func(f"Starting Pass 2...", replace_last=True)
-                cur_cmd = ['ffmpeg', '-y', '-hide_banner', '-stats'] + hw_init + ['-i', input_file] + \
-                          ['-vf', v_filter] + enc_args + ['-pass', '2'] + audio_args + a_filter_args + meta_args + [output_file]
-
-            process = subprocess.Popen(
-                cur_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1,
-                creationflags=SUBPROCESS_FLAGS
-            )
-
-            progress_re = re.compile(r"fps=\s*([\d.]+).*time=(\d+:\d+:\d+\.\d+).*speed=\s*([\d.]+)x")
-            error_log = []
-
-            if process.stdout:
-                for line in process.stdout:
-                    if stop_event and stop_event.is_set():
-                        try: process.terminate()
-                        except: pass
-                        if prev_process:
-                            try: prev_process.terminate()
-                            except: pass
-                        log_func("🛑 Process stopped by user.")
-                        try: os.remove(preview_path) if preview_path and os.path.exists(preview_path) else None
-                        except: pass
-                        return False
-                    
-                    match = progress_re.search(line)
-                    if match:
-                        fps_val, time_val, speed_val = match.groups()
-                        if progress_callback:
-                            current_secs = hms_to_seconds(time_val)
-                            if p == 0:
-                                pct = min(current_secs / duration, 1.0) if duration > 0 else 0
-                            else:
-                                pct_mult = 0.5
-                                base_pct = 0.5 if p == 2 else 0.0
-                                pct = base_pct + (min(current_secs / duration, 1.0) * pct_mult) if duration > 0 else 0
-                            
-                            try:
-                                speed = float(speed_val)
-                                rem_secs = (duration - current_secs) / speed if speed > 0 else 0
-                                m, s = divmod(int(rem_secs), 60)
-                                h, m = divmod(m, 60)
-                                rem_time_str = f"{h:02d}:{m:02d}:{s:02d}"
-                            except:
-                                rem_time_str = "00:00:00"
-
-                            progress_callback({
-                                "res": res,
-                                "pct": pct,
-                                "fps": fps_val,
-                                "rem_time": rem_time_str
-                            })
-                        
-                        if p == 2:
-                            log_func(f"⏳ {time_val} @ {fps_val} fps | Speed: {speed_val}x", replace_last=True)
-                        elif p == 1:
-                            log_func(f"⏳ Pass 1: {time_val} @ {fps_val} fps | Speed: {speed_val}x", replace_last=True)
-                        else:
-                            log_func(f"⏳ {time_val} @ {fps_val} fps | Speed: {speed_val}x", replace_last=True)
+                cur_cmd = ['ffmpeg', '-y', '-hide_banner'] + hw_init + ['-i', input_file] + \
+                          ['-vf', v_filter] + enc_args + ['-pass', '2'] + pass_args + enc_tail_args + fs_cap_args(target_mb) + [encode_out] + preview_args
+
+            # Pass 1 writes no output, so there is nothing to project
+            monitor = OvershootMonitor(encode_out, target_mb, duration, shared_audio.estimated_mb if shared_audio else 0.0) if p != 1 else None
+            aborted_at = []
+            last_secs = [0.0]
+
+            def on_encode_progress(prog, p=p, monitor=monitor):
+                current_secs = prog.secs
+                last_secs[0] = current_secs
+                time_str = _format_hms(current_secs)
+                if monitor and monitor.should_abort(current_secs, prog.total_size):
+                    aborted_at.append(time_str)
+                    return True
+                if progress_callback:
+                    if p == 0:
+                        pct = min(current_secs / duration, 1.0) if duration > 0 else 0
                     else:
-                        if line.strip():
-                            error_log.append(line.strip())
-                            if len(error_log) > 20: error_log.pop(0)
+                        base_pct = 0.5 if p == 2 else 0.0
+                        pct = base_pct + (min(current_secs / duration, 1.0) * 0.5) if duration > 0 else 0
+                    rem_secs = (duration - current_secs) / prog.speed if prog.speed > 0 else 0
+                    progress_callback({
+                        "res": res,
+                        "pct": pct,
+                        "fps": f"{prog.fps:.1f}",
+                        "rem_time": _format_hms(rem_secs)
+                    })
+                pass_label = "Pass 1: " if p == 1 else ""
+                log_func(f"⏳ {pass_label}{time_str} @ {prog.fps:.1f} fps | Speed: {prog.speed:.2f}x", replace_last=True)
+
+            returncode, error_log = run_ffmpeg(cur_cmd, on_encode_progress, stop_event, preview)
 
-            process.wait()
-            if process.returncode != 0:
-                log_func(f"❌ FFmpeg process failed during Pass {p} with exit code {process.returncode}")
+            if stop_event and stop_event.is_set():
+                log_func("🛑 Process stopped by user.")
+                return False
+            if aborted_at:
+                log_func(f"✂️ Projected {monitor.projected_mb:.2f} MB (target {target_mb:.2f} MB) at {aborted_at[0]}, abandoning {res}p early.")
+                try: os.remove(encode_out)
+                except: pass
+                if attempt_stats is not None:
+                    attempt_stats["projected_mb"] = monitor.projected_mb
+                return OVERSHOOT
+            if returncode != 0:
+                log_func(f"❌ FFmpeg process failed during Pass {p} with exit code {returncode}")
                 if error_log:
                     log_func(f"Last output:\n" + "\n".join(error_log))
-                if prev_process:
-                    try: prev_process.terminate()
-                    except: pass
                 return False
+            # ffmpeg exits cleanly when -fs is hit, so a file at the cap is a truncated encode
+            if p != 1 and os.path.exists(encode_out) and os.path.getsize(encode_out) >= fs_cap_bytes(target_mb):
+                written_mb = os.path.getsize(encode_out) / 1048576
+                projected_mb = written_mb * duration / last_secs[0] if last_secs[0] > 0 else written_mb
+                if shared_audio:
+                    projected_mb += shared_audio.estimated_mb
+                log_func(f"✂️ Output hit the size cap at {_format_hms(last_secs[0])}, {res}p is too large.")
+                try: os.remove(encode_out)
+                except: pass
+                if attempt_stats is not None:
+                    attempt_stats["projected_mb"] = projected_mb
+                return OVERSHOOT
         
-        if prev_process:
-            try: prev_process.terminate()
-            except: pass
+        if shared_audio:
+            return shared_audio.mux(encode_out, output_file, meta_args, log_func)
         return True
     except Exception as e:
-        if prev_process:
-            try: prev_process.terminate()
-            except: pass
         log_func(f"❌ Error: {e}")
         return False
+    finally:
+        if passlog_dir:
+            shutil.rmtree(passlog_dir, ignore_errors=True)
+
+# --- Size Prediction ---
+# Encode a few short, evenly spaced samples at a candidate resolution and extrapolate the
+# full output size from their bitrate. This lets auto_compress start the real encode at the
+# highest rung that should fit, instead of discovering overshoots one full encode at a time.
+# Samples run at constant quality, not at the attempt's bitrate: an ABR sample just lands
+# near its own setpoint, while a constant-quality one measures what the content needs at
+# that resolution. A rung fits when that need, at the lowest quality still worth shipping,
+# is within the budget. Each sample opens with a forced keyframe that a real encode only
+# pays once per GOP, so its size is spread over a GOP instead of the sample.
+
+PREDICTION_SAMPLES = 3
+PREDICTION_SAMPLE_SECONDS = 2.0
+PREDICTION_MIN_DURATION = 60  # Shorter clips are cheaper to just encode
+PREDICTION_MARGIN = 0.95  # Predicted size must land this far under the target to count as a fit
+PREDICTION_DEFAULT_GOP = 250  # Encoder default keyframe interval (frames) when none is set
+CONTAINER_OVERHEAD = 1.02
+
+# Constant-quality settings per software encoder, at the lowest quality still worth shipping.
+# Hardware attempts are sampled with the software encoder for the same codec.
+PREDICTION_QUALITY_ARGS = {
+    "libx264": ['-crf', '28'],
+    "libx265": ['-crf', '30'],
+    "libvpx-vp9": ['-crf', '40', '-b:v', '0'],
+    "libaom-av1": ['-crf', '40', '-b:v', '0'],
+    "libsvtav1": ['-crf', '42'],
+    "libvvenc": ['-qp', '36'],
+}
+
+def _arg_value(args, flag):
+    try:
+        return args[args.index(flag) + 1]
+    except (ValueError, IndexError):
+        return None
+
+def _kbps_from_arg(value):
+    if not value: return None
+    value = str(value).lower()
+    mult = 1000 if value.endswith('m') else 1
+    try:
+        return float(value.rstrip('km')) * mult
+    except ValueError:
+        return None
+
+def estimate_audio_kbps(audio_args, info):
+    """Rough audio bitrate for the compressor's audio args, used for size projection."""
+    if info is not None and not info.a_codec:
+        return 0
+    codec = _arg_value(audio_args, '-c:a')
+    kbps = _kbps_from_arg(_arg_value(audio_args, '-b:a'))
+    if kbps:
+        return kbps
+    rate = (info.sample_rate if info and info.sample_rate else 48000)
+    channels = (info.channels if info and info.channels else 2)
+    if codec == 'copy':
+        return (info.a_bitrate / 1000) if info and info.a_bitrate else 192
+    if codec == 'pcm_s24le':
+        return rate * channels * 24 / 1000
+    if codec == 'pcm_s16le':
+        return rate * channels * 16 / 1000
+    if codec in ('flac', 'alac'):
+        return rate * channels * 16 / 1000 * 0.6
+    return 128
+
+def _sample_packet_sizes(path):
+    """Video packet sizes of an encoded sample in decode order (the first one is its opening keyframe)."""
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=size",
+           "-of", "csv=p=0", path]
+    result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
+    if result.returncode != 0:
+        return []
+    return [size for size in (_to_int(l.strip().rstrip(',')) for l in result.stdout.splitlines()) if size]
+
+def predict_output_size(input_file, target_mb, res, codec, use_gpu, log_func=print, stop_event=None, advanced_params=None,
+                        samples=PREDICTION_SAMPLES, sample_seconds=PREDICTION_SAMPLE_SECONDS):
+    """
+    Predict the output size an encode at `res` needs, from short constant-quality samples.
+    Returns {"mb": predicted size, "bpp": video bits per pixel, "video_kbps": measured rate}
+    or None if sampling failed or the encoder has no constant-quality mode here.
+    """
+    info = probe(input_file, log_func)
+    if info is None or not info.duration:
+        return None
+    duration = info.duration
+
+    plan = build_video_encode(input_file, target_mb, res, codec, False, lambda *a, **k: None, advanced_params, duration)
+    if plan is None or plan["v_enc"] not in PREDICTION_QUALITY_ARGS:
+        return None
+    # Swap the attempt's target bitrate for constant quality, keep everything else
+    enc_args = list(plan["enc_args"])
+    if '-b:v' in enc_args:
+        i = enc_args.index('-b:v')
+        del enc_args[i:i + 2]
+    enc_args += PREDICTION_QUALITY_ARGS[plan["v_enc"]]
+    gop = _to_int(advanced_params.get("keyframe")) if advanced_params else None
+    gop = gop or PREDICTION_DEFAULT_GOP
+
+    sample_seconds = min(sample_seconds, duration / (samples + 1))
+    tmp_dir = tempfile.mkdtemp(prefix="size_probe_")
+    total_bytes = 0.0
+    total_secs = 0.0
+    try:
+        for i in range(samples):
+            if stop_event and stop_event.is_set():
+                return None
+            offset = max(duration * (i + 1) / (samples + 1) - sample_seconds / 2, 0)
+            sample_out = os.path.join(tmp_dir, f"sample_{i}.mkv")
+            cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error'] + plan["hw_init"] + \
+                  ['-ss', f"{offset:.3f}", '-t', f"{sample_seconds:.3f}", '-i', input_file] + \
+                  ['-vf', plan["v_filter"]] + enc_args + ['-an', '-f', 'matroska', sample_out]
+            result = subprocess.run(cmd, capture_output=True, text=True, creationflags=SUBPROCESS_FLAGS)
+            if result.returncode != 0 or not os.path.exists(sample_out):
+                return None
+            sizes = _sample_packet_sizes(sample_out)
+            if len(sizes) < 2:
+                return None
+            # The opening keyframe is paid once per GOP in the real encode, not once per sample
+            frames = len(sizes)
+            total_bytes += frames * (sum(sizes[1:]) / (frames - 1) + sizes[0] / gop)
+            total_secs += sample_seconds
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if total_secs <= 0 or total_bytes <= 0:
+        return None
+
+    measured_kbps = total_bytes * 8 / 1000 / total_secs
+    audio_kbps = estimate_audio_kbps(build_audio_args(advanced_params)[0], info)
+    predicted_mb = (measured_kbps + audio_kbps) * 1000 / 8 * duration * CONTAINER_OVERHEAD / 1048576
+
+    bpp = None
+    out_h = plan["res"] if isinstance(plan["res"], int) else None
+    if out_h and info.width and info.height and info.fps:
+        out_w = out_h * info.width / info.height
+        bpp = measured_kbps * 1000 / (out_w * out_h * info.fps)
 
-def auto_compress(input_file, target_mb, codec, use_gpu, output_file=None, log_func=print, stop_event=None, preview_path=None, progress_callback=None, advanced_params=None, res_params=None):
+    return {"mb": predicted_mb, "bpp": bpp, "video_kbps": measured_kbps}
+
+def predict_start_resolution(input_file, res_list, target_mb, codec, use_gpu, log_func=print, stop_event=None, advanced_params=None):
+    """
+    Return the index in `res_list` of the highest rung predicted to fit under `target_mb`.
+    Returns 0 (try the full ladder) when prediction is not possible.
+    """
+    for idx, res in enumerate(res_list):
+        if stop_event and stop_event.is_set():
+            return 0
+        pred = predict_output_size(input_file, target_mb, res, codec, use_gpu, log_func, stop_event, advanced_params)
+        if pred is None:
+            log_func("⚠️ Size prediction unavailable, using the full resolution ladder.")
+            return 0
+        quality = f", {pred['bpp']:.3f} bpp" if pred["bpp"] is not None else ""
+        log_func(f"🔮 {res}p needs about {pred['mb']:.2f} MB{quality}")
+        if pred["mb"] <= target_mb * PREDICTION_MARGIN:
+            return idx
+    return len(res_list) - 1
+
+def auto_compress(input_file, target_mb, codec, use_gpu, output_file=None, log_func=print, stop_event=None, preview=None, progress_callback=None, advanced_params=None, res_params=None, cpus=None):
     legacy_codecs = ["libxvid", "msmpeg4v2", "flv1", "h261", "h263", "snow", "cinepak", "roq", "smc", "vc1"]
     
     if not output_file:
@@ -513,52 +1824,266 @@ def auto_compress(input_file, target_mb, codec, use_gpu, output_file=None, log_f
         fixed_res = res_params.get("fixed", 1080)
         res_list = [fixed_res]
     else:
-        # Auto: use progressive scale-down list, bounded by min/max
-        all_res = [2160, 1440, 1080, 720, 480, 360, 240]
-        res_max = res_params.get("max")
-        res_min = res_params.get("min")
-        res_list = [r for r in all_res if (res_max is None or r <= res_max) and (res_min is None or r >= res_min)]
-        if not res_list:
-            # Fallback if user set an impossible range
-            res_list = [1080, 720, 480, 360]
+        # Auto: scale-down list built from the source, bounded by min/max
+        info = probe(input_file, log_func)
+        fps_override = advanced_params.get("fps") if advanced_params else None
+        res_list = build_resolution_ladder(info, target_mb, codec, res_params.get("min"), res_params.get("max"), fps_override, smart_log)
+
+        duration = info.duration if info else None
+        predict = res_params.get("predict", True) and codec not in legacy_codecs
+        if predict and len(res_list) > 1 and duration and duration >= PREDICTION_MIN_DURATION:
+            smart_log("🔮 Sampling to predict the output size...")
+            start_idx = predict_start_resolution(input_file, res_list, target_mb, codec, use_gpu, smart_log, stop_event, advanced_params)
+            if start_idx > 0:
+                smart_log(f"⏭️ Starting at {res_list[start_idx]}p (higher resolutions predicted to overshoot)")
+            # Remaining lower rungs stay as the fallback ladder
+            res_list = res_list[start_idx:]
 
     last_result_size = None  # Tracks most recent output size (for "too big" detection)
 
-    for res in res_list:
-        if stop_event and stop_event.is_set(): break
+    # Encode the audio once, alongside the first video attempt, and reuse it on every rung.
+    # With a single rung there is nothing to reuse it on, so it would only add a demux and remux.
+    shared_audio = None
+    audio_args, a_filter_args = build_audio_args(advanced_params)
+    if len(res_list) > 1 and (advanced_params is None or advanced_params.get("shared_audio", True)):
+        if SharedAudioTrack.is_useful(input_file, audio_args):
+            shared_audio = SharedAudioTrack(input_file, audio_args, a_filter_args, smart_log, stop_event)
 
-        success = compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, smart_log, stop_event, preview_path, progress_callback, advanced_params)
+    try:
+        for res in res_list:
+            if stop_event and stop_event.is_set(): break
+
+            attempt_stats = {}
+            success = compress_attempt(input_file, output_file, target_mb, res, codec, use_gpu, smart_log, stop_event, preview, progress_callback, advanced_params, attempt_stats, shared_audio, cpus)
         
-        if not success and use_gpu and not (stop_event and stop_event.is_set()):
-            smart_log(f"🔄 GPU attempt failed at {res}p. Retrying with Software...")
-            success = compress_attempt(input_file, output_file, target_mb, res, codec, False, smart_log, stop_event, preview_path, progress_callback, advanced_params)
-
-        if success and os.path.exists(output_file):
-            final_size = os.path.getsize(output_file) / 1048576
-            if final_size <= target_mb:
-                smart_log(f"\n✅ SUCCESS: {output_file} ({final_size:.2f} MB)")
-                if is_deck:
-                    subprocess.run(['kitten', 'notify', 'Compression Done', f"{res}p {codec} finished"], stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
-                try: os.remove(preview_path) if preview_path and os.path.exists(preview_path) else None
-                except: pass
-                return True, output_file, None
-            else:
-                last_result_size = final_size
+            if not success and use_gpu and not (stop_event and stop_event.is_set()):
+                smart_log(f"🔄 GPU attempt failed at {res}p. Retrying with Software...")
+                success = compress_attempt(input_file, output_file, target_mb, res, codec, False, smart_log, stop_event, preview, progress_callback, advanced_params, attempt_stats, shared_audio, cpus)
+
+            if success == OVERSHOOT:
+                last_result_size = attempt_stats.get("projected_mb")
                 if res_mode == "fixed":
-                    # In fixed mode there's only one attempt, report size and stop
-                    smart_log(f"⚠️ Result too large ({final_size:.2f} MB). Fixed resolution mode — no fallback.")
+                    smart_log(f"⚠️ Projected result too large ({last_result_size:.2f} MB). Fixed resolution mode — no fallback.")
                     break
-                smart_log(f"⚠️ Result too large ({final_size:.2f}MB). Trying lower resolution...")
-        elif not (stop_event and stop_event.is_set()):
-            smart_log(f"❌ Encoding failed at {res}p. Skipping...")
-    
-    try: os.remove(preview_path) if preview_path and os.path.exists(preview_path) else None
-    except: pass
+                smart_log(f"⚠️ Projected result too large ({last_result_size:.2f} MB). Trying lower resolution...")
+            elif success and os.path.exists(output_file):
+                final_size = os.path.getsize(output_file) / 1048576
+                if final_size <= target_mb:
+                    smart_log(f"\n✅ SUCCESS: {output_file} ({final_size:.2f} MB)")
+                    if is_deck:
+                        subprocess.run(['kitten', 'notify', 'Compression Done', f"{res}p {codec} finished"], stderr=subprocess.DEVNULL, creationflags=SUBPROCESS_FLAGS)
+                    return True, output_file, None
+                else:
+                    last_result_size = final_size
+                    if res_mode == "fixed":
+                        # In fixed mode there's only one attempt, report size and stop
+                        smart_log(f"⚠️ Result too large ({final_size:.2f} MB). Fixed resolution mode — no fallback.")
+                        break
+                    smart_log(f"⚠️ Result too large ({final_size:.2f}MB). Trying lower resolution...")
+            elif not (stop_event and stop_event.is_set()):
+                smart_log(f"❌ Encoding failed at {res}p. Skipping...")
     
-    # If last_result_size is set it means encoding succeeded but was too large — return it for the UI
-    return False, None, last_result_size
+        # If last_result_size is set it means encoding succeeded but was too large — return it for the UI
+        return False, None, last_result_size
+    finally:
+        if shared_audio:
+            shared_audio.cleanup()
+
+# --- Batch Scheduler ---
+# Runs many compression jobs concurrently. Software jobs take a CPU slot, hardware encodes
+# take a GPU session slot (consumer GPUs cap concurrent encode sessions), so a batch can
+# keep both busy at once. Each slot class has its own worker pool, so queued software jobs
+# never hold up a hardware job waiting for a free GPU slot (or the other way round).
+# Each job has its own stop event and progress; the scheduler tracks aggregate throughput.
+
+def default_cpu_slots():
+    # Software encoders already use several threads each; a few concurrent jobs hide the
+    # per-file startup/probe/mux gaps without oversubscribing the machine
+    return max(1, min(4, (os.cpu_count() or 1) // 4))
+
+DEFAULT_GPU_SLOTS = 2
+
+class CompressionJob:
+    """One file to compress. Results land in `status`, `output_file` and `result_size`."""
+    def __init__(self, input_file, target_mb, codec, use_gpu, output_file=None, advanced_params=None, res_params=None, preview=None):
+        self.input_file = input_file
+        self.target_mb = target_mb
+        self.codec = codec
+        self.use_gpu = use_gpu
+        self.output_file = output_file
+        self.advanced_params = advanced_params
+        self.res_params = res_params
+        self.preview = preview  # PreviewFrames fed by this job's encodes
+        self.stop_event = threading.Event()
+        self.status = "queued"  # queued, running, done, too_big, failed, cancelled
+        self.progress = {"pct": 0.0}
+        self.result_size = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.input_file)
+
+    def cancel(self):
+        self.stop_event.set()
+
+class JobScheduler:
+    """
+    Runs CompressionJobs with bounded concurrency.
+    `on_progress(job, data)` and `on_job_done(job)` are called from worker threads.
+    """
+    def __init__(self, cpu_slots=None, gpu_slots=DEFAULT_GPU_SLOTS, log_func=print, on_progress=None, on_job_done=None, stop_event=None):
+        self.cpu_slots = cpu_slots or default_cpu_slots()
+        self.gpu_slots = max(1, gpu_slots)
+        self.log_func = log_func
+        self.on_progress = on_progress
+        self.on_job_done = on_job_done
+        self.stop_event = stop_event
+        self.jobs = []
+        self._lock = threading.Lock()
+        self.job_cpus = None  # Cores each job may use, set by run() when software jobs overlap
+        self.started_at = None
+        self.finished_at = None
+
+    def _job_kind(self, job):
+        if not job.use_gpu:
+            return "cpu"
+        v_enc = get_encoder(job.codec, True, log_func=lambda *a, **k: None)
+        # A hardware encoder that fails its smoke test would fall back to software inside the
+        # job, so it belongs in the CPU pool from the start (the verdict is cached per encoder)
+        if is_hw_encoder(v_enc) and hw_encoder_usable(v_enc, self.log_func):
+            return "gpu"
+        return "cpu"
+
+    def _job_log(self, job):
+        concurrent = len(self.jobs) > 1 and (self.cpu_slots + self.gpu_slots) > 1
+        def job_log(msg, replace_last=False):
+            if concurrent:
+                # In-place progress lines from parallel jobs would overwrite each other
+                if replace_last: return
+                msg = f"[{job.name}] {str(msg).strip()}"
+            self.log_func(msg, replace_last=replace_last)
+        return job_log
+
+    def _run_job(self, job):
+        if job.stop_event.is_set():
+            job.status = "cancelled"
+            return job
+        job.status = "running"
+        job.started_at = time.time()
+        self.log_func(f"\n📹 Processing: {job.name}")
+
+        def job_progress(data):
+            job.progress = data
+            if self.on_progress:
+                self.on_progress(job, data)
+
+        try:
+            success, final_output, result_size = auto_compress(
+                job.input_file, job.target_mb, job.codec, job.use_gpu,
+                output_file=job.output_file,
+                log_func=self._job_log(job),
+                stop_event=job.stop_event,
+                preview=job.preview,
+                progress_callback=job_progress,
+                advanced_params=job.advanced_params,
+                res_params=job.res_params,
+                cpus=self.job_cpus
+            )
+        except Exception as e:
+            self.log_func(f"❌ [{job.name}] Error: {e}")
+            success, final_output, result_size = False, None, None
+
+        job.finished_at = time.time()
+        job.result_size = result_size
+        if success:
+            job.status = "done"
+            job.output_file = final_output
+            job.progress = dict(job.progress, pct=1.0)
+        elif job.stop_event.is_set():
+            job.status = "cancelled"
+        elif result_size is not None:
+            job.status = "too_big"
+        else:
+            job.status = "failed"
+
+        if self.on_job_done:
+            self.on_job_done(job)
+        return job
+
+    def run(self, jobs):
+        """Run all jobs and block until they finish or are cancelled. Returns the jobs."""
+        self.jobs = list(jobs)
+        self.started_at = time.time()
+        by_kind = {"cpu": [], "gpu": []}
+        for job in self.jobs:
+            by_kind[self._job_kind(job)].append(job)
+        slots = {"cpu": self.cpu_slots, "gpu": self.gpu_slots}
+        # Concurrent software jobs split the cores, so a chunked encode in one of them spreads
+        # over its share instead of the whole machine (GPU jobs may fall back to software too)
+        concurrent_cpu = min(len(by_kind["cpu"]), self.cpu_slots) + (1 if by_kind["gpu"] else 0)
+        self.job_cpus = max(1, (os.cpu_count() or 1) // concurrent_cpu) if concurrent_cpu > 1 else None
+        # One pool per slot class: a worker only ever waits for its own kind of slot
+        pools = {kind: ThreadPoolExecutor(max_workers=min(len(kind_jobs), slots[kind]))
+                 for kind, kind_jobs in by_kind.items() if kind_jobs}
+        try:
+            futures = [pools[kind].submit(self._run_job, job) for kind, kind_jobs in by_kind.items() for job in kind_jobs]
+            while not all(f.done() for f in futures):
+                if self.stop_event and self.stop_event.is_set():
+                    self.cancel_all()
+                time.sleep(0.25)
+        except KeyboardInterrupt:
+            # Let running ffmpeg processes wind down before the pools join them
+            self.cancel_all()
+            raise
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        self.finished_at = time.time()
+        return self.jobs
+
+    def cancel_all(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def overall_progress(self):
+        """Mean completion over all jobs (finished jobs count as 1.0)."""
+        if not self.jobs:
+            return 0.0
+        total = 0.0
+        for job in self.jobs:
+            if job.status in ("done", "too_big", "failed", "cancelled"):
+                total += 1.0
+            else:
+                total += job.progress.get("pct", 0.0)
+        return total / len(self.jobs)
+
+    def stats(self):
+        """Aggregate throughput for the batch so far."""
+        finished = [j for j in self.jobs if j.finished_at]
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0
+        input_mb = 0.0
+        for j in finished:
+            try: input_mb += os.path.getsize(j.input_file) / 1048576
+            except OSError: pass
+        return {
+            "jobs": len(self.jobs),
+            "finished": len(finished),
+            "succeeded": sum(1 for j in self.jobs if j.status == "done"),
+            "elapsed": elapsed,
+            "input_mb": input_mb,
+            "files_per_min": len(finished) / elapsed * 60 if elapsed > 0 else 0.0,
+            "mb_per_sec": input_mb / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def log_stats(self):
+        st = self.stats()
+        self.log_func(f"📊 {st['finished']}/{st['jobs']} files in {st['elapsed']:.1f}s "
+                      f"({st['files_per_min']:.1f} files/min, {st['mb_per_sec']:.1f} MB/s input)")
 
 def simple_convert(input_file, output_file, vcodec, acodec, log_func=print, progress_callback=None):
+    """Plain transcode/remux. `progress_callback` receives Progress records."""
     try:
         total_duration = get_video_duration(input_file, log_func)
         if total_duration is None: total_duration = 0
@@ -575,33 +2100,277 @@ def simple_convert(input_file, output_file, vcodec, acodec, log_func=print, prog
         cmd.append(output_file)
         
         log_func(f"🚀 Running: {' '.join(cmd)}")
-        process = subprocess.Popen(cmd, stderr=subprocess.PIPE, universal_newlines=True, creationflags=SUBPROCESS_FLAGS)
-        
-        progress_re = re.compile(r"time=(\d{2}:\d{2}:\d{2}\.\d{2})")
-        
-        while True:
-            line = process.stderr.readline()
-            if not line and process.poll() is not None: break
-            if line:
-                match = progress_re.search(line)
-                if match and total_duration > 0:
-                    t_str = match.group(1)
-                    parts = t_str.split(':')
-                    secs = float(parts[0])*3600 + float(parts[1])*60 + float(parts[2])
-                    pct = min(secs / total_duration, 1.0)
-                    if progress_callback:
-                        progress_callback({"pct": pct, "time": t_str})
-                    log_func(f"⏳ Progress: {int(pct*100)}% ({t_str})", replace_last=True)
-        
-        if process.returncode == 0:
+
+        def on_convert_progress(prog):
+            if progress_callback:
+                progress_callback(prog)
+            if total_duration > 0:
+                pct = min(prog.secs / total_duration, 1.0)
+                log_func(f"⏳ Progress: {int(pct*100)}% ({_format_hms(prog.secs)})", replace_last=True)
+
+        returncode, errors = run_ffmpeg(cmd, on_convert_progress)
+        if returncode == 0:
             return True, output_file
         else:
+            if errors:
+                log_func("\n".join(errors))
             return False, None
     except Exception as e:
         log_func(f"❌ Conversion Error: {e}")
         return False, None
 
-def merge_videos(video_paths, output_path, log_func=print, stop_event=None, use_gpu=True):
+# --- Merging ---
+# When every clip already shares the same stream parameters (same camera, same settings)
+# the concat demuxer can join them with -c copy at disk speed. Anything else goes through
+# the normalizing filter_complex re-encode in merge_videos.
+
+COPY_MERGE_CONTAINERS = {".mp4", ".mov", ".m4v", ".mkv", ".webm", ".ts", ".mts"}
+MERGE_GROUP_SIZE = 16  # Inputs (demuxers + decoders) open at once in a re-encoded merge
+
+def concat_signature(info):
+    """Stream parameters that have to match across inputs for a stream-copy concat."""
+    if info is None or not info.v_codec:
+        return None
+    return (info.v_codec, info.v_profile, info.width, info.height, info.pix_fmt, info.time_base,
+            info.rotation, info.a_codec, info.sample_rate, info.channels, info.channel_layout)
+
+def can_concat_copy(infos, output_path=None):
+    """True if all probed inputs can be joined without re-encoding."""
+    if output_path and os.path.splitext(output_path)[1].lower() not in COPY_MERGE_CONTAINERS:
+        return False
+    signatures = {concat_signature(info) for info in infos}
+    return len(signatures) == 1 and None not in signatures
+
+def write_concat_list(paths, list_path, ranges=None):
+    """
+    Write an ffconcat file for the concat demuxer (use with -safe 0).
+    `ranges` optionally gives an (inpoint, outpoint) pair per path; either end may be None.
+    A third item, if present and not None, is written as the entry's duration, which the
+    demuxer then uses to place the next file instead of outpoint - inpoint.
+    """
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for i, path in enumerate(paths):
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            inpoint, outpoint = ranges[i][:2] if ranges else (None, None)
+            duration = ranges[i][2] if ranges and len(ranges[i]) > 2 else None
+            if duration is not None:
+                f.write(f"duration {duration:.6f}\n")
+            if inpoint:
+                f.write(f"inpoint {inpoint:.6f}\n")
+            if outpoint is not None:
+                f.write(f"outpoint {outpoint:.6f}\n")
+
+def concat_copy(video_paths, output_path, log_func=print, stop_event=None, progress_callback=None):
+    """Join `video_paths` with the concat demuxer and -c copy. Returns True on success."""
+    tmp_dir = tempfile.mkdtemp(prefix="concat_copy_")
+    try:
+        list_path = os.path.join(tmp_dir, "inputs.txt")
+        write_concat_list(video_paths, list_path)
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-map', '0:v:0', '-map', '0:a?', '-c', 'copy']
+        if os.path.splitext(output_path)[1].lower() in (".mp4", ".mov", ".m4v"):
+            cmd += ['-movflags', '+faststart']
+        cmd.append(output_path)
+
+        def on_copy_progress(prog):
+            if progress_callback:
+                progress_callback(prog)
+            log_func(f"⏳ {_format_hms(prog.secs)} | Speed: {prog.speed:.1f}x", replace_last=True)
+
+        returncode, errors = run_ffmpeg(cmd, on_copy_progress, stop_event)
+        if returncode != 0 and errors and not (stop_event and stop_event.is_set()):
+            log_func("\n".join(errors[-5:]))
+        return returncode == 0
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Selective normalization: when most of the running time shares one profile, only the odd
+# clips are re-encoded to that profile (in parallel, cached by fingerprint) and the result
+# is still joined with a stream copy.
+# Only codecs that survive a copy join with another encoder's output are listed. The concat
+# demuxer keeps the first file's extradata and only puts parameter sets in-band for H.264
+# (auto_convert); VP9 needs none. HEVC, AV1 and MPEG-4 clips from a different encoder
+# would be decoded with the wrong VPS/SPS/PPS or sequence header, so those fully re-encode.
+
+CONFORM_VIDEO_ENCODERS = {
+    "h264": ['-c:v', 'libx264', '-crf', '18', '-preset', 'medium'],
+    "vp9": ['-c:v', 'libvpx-vp9', '-crf', '30', '-b:v', '0', '-row-mt', '1'],
+}
+CONFORM_AUDIO_ENCODERS = {
+    "aac": ['-c:a', 'aac', '-b:a', '192k'],
+    "opus": ['-c:a', 'libopus', '-b:a', '160k'],
+    "mp3": ['-c:a', 'libmp3lame', '-b:a', '192k'],
+    "ac3": ['-c:a', 'ac3', '-b:a', '384k'],
+    "flac": ['-c:a', 'flac'],
+    "pcm_s16le": ['-c:a', 'pcm_s16le'],
+}
+CONFORM_MAX_FRACTION = 0.5  # Past this share of the running time a full re-encode is just as cheap
+CONFORM_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+def _video_rate(info):
+    """ffprobe's rational frame rate string for the first video stream, or None."""
+    stream = next((st for st in info.streams if st.get("codec_type") == "video"), {})
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        if parse_frame_rate(stream.get(key)):
+            return stream[key]
+    return None
+
+def dominant_profile(infos):
+    """The probed input whose concat_signature covers the most running time, or None."""
+    weights = {}
+    reference = {}
+    for info in infos:
+        sig = concat_signature(info)
+        if sig is None:
+            continue
+        weights[sig] = weights.get(sig, 0.0) + (info.duration or 0.0)
+        reference.setdefault(sig, info)
+    if not weights:
+        return None
+    return reference[max(weights, key=weights.get)]
+
+def can_conform_to(ref):
+    """True if other clips can be re-encoded to match `ref` closely enough for a copy join."""
+    if ref is None or not ref.v_codec or ref.rotation or not ref.width or not ref.height:
+        return False
+    if ref.v_codec not in CONFORM_VIDEO_ENCODERS or (ref.a_codec and ref.a_codec not in CONFORM_AUDIO_ENCODERS):
+        return False
+    return has_encoder(CONFORM_VIDEO_ENCODERS[ref.v_codec][1])
+
+def plan_selective_merge(infos, output_path=None):
+    """
+    Decide whether conforming a few outliers beats a full re-encode.
+    Returns (reference_info, outlier_indices) or None.
+    """
+    if output_path and os.path.splitext(output_path)[1].lower() not in COPY_MERGE_CONTAINERS:
+        return None
+    if any(info is None or not info.v_codec for info in infos):
+        return None
+    ref = dominant_profile(infos)
+    if not can_conform_to(ref):
+        return None
+    ref_sig = concat_signature(ref)
+    outliers = [i for i, info in enumerate(infos) if concat_signature(info) != ref_sig]
+    total = sum(info.duration or 0.0 for info in infos)
+    odd = sum(infos[i].duration or 0.0 for i in outliers)
+    if not outliers or (total > 0 and odd / total > CONFORM_MAX_FRACTION):
+        return None
+    return ref, outliers
+
+def _profile_arg(ref):
+    # ffprobe reports e.g. "High", "Main 10", "Constrained Baseline"; encoders want "high", "main10", "baseline"
+    if not ref.v_profile or ref.v_codec != "h264":
+        return []
+    profile = ref.v_profile.lower().replace("constrained ", "").replace(" ", "")
+    return ['-profile:v', profile]
+
+def conform_args(ref, has_audio=True, copy_audio=False):
+    """
+    ffmpeg output args that turn any clip into `ref`'s stream profile.
+    With `copy_audio` (a clip cut from `ref` itself) every audio stream is copied as is.
+    """
+    w, h = ref.width, ref.height
+    v_filter = (f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+                f"setsar=1,format={ref.pix_fmt}")
+    rate = _video_rate(ref)
+    if rate:
+        v_filter += f",fps={rate}"
+    args = ['-map', '0:v:0', '-vf', v_filter] + CONFORM_VIDEO_ENCODERS[ref.v_codec] + _profile_arg(ref)
+    # MP4/MOV time bases come from the track timescale (Matroska's is always 1/1000)
+    if ref.time_base and ref.time_base.startswith("1/") and os.path.splitext(ref.path)[1].lower() in (".mp4", ".mov", ".m4v"):
+        args += ['-video_track_timescale', ref.time_base[2:]]
+    if ref.a_codec and copy_audio:
+        args += ['-map', '0:a?', '-c:a', 'copy']
+    elif ref.a_codec:
+        # Clips without audio get silence from the anullsrc input (index 1) so the streams line up
+        args += ['-map', '0:a:0' if has_audio else '1:a:0'] + CONFORM_AUDIO_ENCODERS[ref.a_codec]
+        a_format = f"aformat=sample_rates={ref.sample_rate}"
+        if ref.channel_layout:
+            a_format += f":channel_layouts={ref.channel_layout}"
+        args += ['-af', a_format]
+        if not has_audio:
+            args += ['-shortest']
+    else:
+        args += ['-an']
+    return args + ['-sn', '-dn', '-map_metadata', '-1']
+
+def _conformed_cache_path(input_path, ref, args):
+    # Keyed on the exact args (and so fps, timescale, profile, filters) as well as the signature,
+    # since two references can share a concat_signature yet conform to different streams
+    key = hashlib.sha1(repr((file_fingerprint(input_path), concat_signature(ref), _video_rate(ref), args)).encode()).hexdigest()
+    return get_cache_path("conformed", key + os.path.splitext(ref.path)[1].lower())
+
+def conform_clip(input_path, ref, log_func=print, stop_event=None):
+    """Re-encode one clip to `ref`'s profile. Returns the (cached) conformed path or None."""
+    info = probe(input_path)
+    has_audio = bool(info and info.a_codec)
+    args = conform_args(ref, has_audio)
+    out_path = _conformed_cache_path(input_path, ref, args)
+    if os.path.exists(out_path):
+        touch_cache_file(out_path)
+        log_func(f"♻️ Reusing conformed copy of {os.path.basename(input_path)}")
+        return out_path
+
+    cmd = ['ffmpeg', '-y', '-hide_banner', '-i', input_path]
+    if ref.a_codec and not has_audio:
+        layout = ref.channel_layout or "stereo"
+        cmd += ['-f', 'lavfi', '-i', f"anullsrc=channel_layout={layout}:sample_rate={ref.sample_rate}"]
+    tmp_path = out_path + ".part" + os.path.splitext(out_path)[1]
+    cmd += args + [tmp_path]
+
+    log_func(f"🔧 Conforming {os.path.basename(input_path)} to {ref.width}x{ref.height} {ref.v_codec}...")
+    returncode, errors = run_ffmpeg(cmd, stop_event=stop_event)
+    if returncode != 0:
+        if errors and not (stop_event and stop_event.is_set()):
+            log_func(f"❌ Conforming {os.path.basename(input_path)} failed:\n" + "\n".join(errors[-5:]))
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return None
+    # Only a clip that really matches is worth caching; otherwise the copy join would break
+    if concat_signature(probe(tmp_path)) != concat_signature(ref):
+        log_func(f"⚠️ {os.path.basename(input_path)} could not be matched to the other clips exactly.")
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return None
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def selective_merge(video_paths, output_path, plan, log_func=print, stop_event=None, progress_callback=None):
+    """Conform the planned outliers in parallel, then stream-copy join everything."""
+    ref, outliers = plan
+    log_func(f"🎯 {len(video_paths) - len(outliers)}/{len(video_paths)} files already match "
+             f"{ref.width}x{ref.height} {ref.v_codec}; re-encoding only the other {len(outliers)}.")
+    return conform_and_join(video_paths, [video_paths[i] for i in outliers], ref, output_path,
+                            log_func, stop_event, progress_callback)
+
+def conform_and_join(video_paths, odd_paths, ref, output_path, log_func=print, stop_event=None, progress_callback=None):
+    """Conform `odd_paths` to `ref` in parallel, then stream-copy join `video_paths` in order."""
+    # The same clip may be queued more than once; conform it once
+    odd_paths = list(dict.fromkeys(odd_paths))
+    workers = max(1, min(len(odd_paths), (os.cpu_count() or 1) // 4))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        conformed = dict(zip(odd_paths, pool.map(lambda p: conform_clip(p, ref, log_func, stop_event), odd_paths)))
+    if any(path is None for path in conformed.values()):
+        return False
+
+    join_paths = [conformed.get(p, p) for p in video_paths]
+    try:
+        return concat_copy(join_paths, output_path, log_func, stop_event, progress_callback)
+    finally:
+        # Pruned only after the join so this merge's own clips are never evicted mid-use
+        prune_cache_dir(os.path.join(CACHE_DIR, "conformed"), CONFORM_CACHE_MAX_BYTES)
+
+def merge_videos(video_paths, output_path, log_func=print, stop_event=None, use_gpu=True, progress_callback=None, stream_copy=True, group_size=MERGE_GROUP_SIZE,
+                 target_policy="majority", target=None):
+    """
+    Concatenate videos into one file. Compatible inputs are stream-copied, everything else
+    is normalized and re-encoded, at most `group_size` inputs per ffmpeg process so memory
+    and open files stay bounded however many clips there are (None: all at once).
+    The re-encode canvas comes from merge_target_profile(`target_policy`, `target`).
+    `progress_callback` receives Progress records.
+    """
     if stop_event and stop_event.is_set():
         return False, "Process cancelled"
 
@@ -617,16 +2386,185 @@ def merge_videos(video_paths, output_path, log_func=print, stop_event=None, use_
         except Exception as e:
             return False, str(e)
 
+    infos = [probe(p) for p in video_paths]
+    if stream_copy and can_concat_copy(infos, output_path):
+        log_func(f"⚡ All {len(video_paths)} files share the same stream parameters, joining without re-encoding...")
+        if concat_copy(video_paths, output_path, log_func, stop_event, progress_callback):
+            return True, output_path
+        if stop_event and stop_event.is_set():
+            log_func("🛑 Process stopped by user.")
+            return False, "Cancelled"
+        log_func("⚠️ Stream copy merge failed, re-encoding instead...")
+    elif stream_copy:
+        plan = plan_selective_merge(infos, output_path)
+        if plan and selective_merge(video_paths, output_path, plan, log_func, stop_event, progress_callback):
+            return True, output_path
+        if stop_event and stop_event.is_set():
+            log_func("🛑 Process stopped by user.")
+            return False, "Cancelled"
+        if plan:
+            log_func("⚠️ Selective merge failed, re-encoding everything instead...")
+
+    encoder = merge_encoder(use_gpu, log_func)
+    size = merge_target_profile(infos, target_policy, target)
+    log_func(f"📐 Merge target: {size['width']}x{size['height']} @ {parse_frame_rate(size['fps']):.2f} fps, {size['sample_rate']} Hz audio")
+    if not group_size or len(video_paths) <= group_size:
+        return _run_normalized_merge(video_paths, output_path, encoder, size, log_func, stop_event, progress_callback)
+
+    # Large merges: encode bounded groups one after another, then stream-copy the parts together.
+    # Every part uses the same filters and encoder settings, so they concat cleanly.
+    groups = [video_paths[i:i + group_size] for i in range(0, len(video_paths), group_size)]
+    log_func(f"🌳 Merging {len(video_paths)} files in {len(groups)} groups of up to {group_size}...")
+    tmp_dir = tempfile.mkdtemp(prefix="merge_groups_")
+    try:
+        parts = []
+        offset = [0]
+        for k, group in enumerate(groups):
+            part = os.path.join(tmp_dir, f"part_{k:04d}.mkv")
+            last = [0]
+
+            def on_group_progress(prog):
+                last[0] = prog.out_time_us
+                if progress_callback:
+                    # Report against the whole merge, not just this group
+                    progress_callback(prog._replace(out_time_us=offset[0] + prog.out_time_us))
+
+            log_func(f"📦 Group {k + 1}/{len(groups)}")
+            ok, result = _run_normalized_merge(group, part, encoder, size, log_func, stop_event, on_group_progress)
+            if not ok:
+                return ok, result
+            offset[0] += last[0]
+            parts.append(part)
+
+        log_func(f"🔗 Joining {len(parts)} groups...")
+        if concat_copy(parts, output_path, log_func, stop_event):
+            return True, output_path
+        if stop_event and stop_event.is_set():
+            log_func("🛑 Process stopped by user.")
+            return False, "Cancelled"
+        return False, "Joining merged groups failed"
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def append_videos(base_path, new_paths, output_path=None, log_func=print, stop_event=None, use_gpu=True, progress_callback=None):
+    """
+    Append clips to an existing merged video without re-encoding it. Only new clips that do
+    not already match the base's stream profile are transcoded; the rest is a stream copy.
+    `output_path` defaults to replacing `base_path`. Falls back to a full merge_videos run.
+    """
+    if stop_event and stop_event.is_set():
+        return False, "Process cancelled"
+    if not new_paths:
+        return False, "No videos to append"
+    output_path = output_path or base_path
+
+    ref = probe(base_path, log_func)
+    ext_ok = os.path.splitext(output_path)[1].lower() in COPY_MERGE_CONTAINERS
+    if ext_ok and ref is not None and concat_signature(ref) is not None:
+        ref_sig = concat_signature(ref)
+        odd_paths = [p for p in new_paths if concat_signature(probe(p)) != ref_sig]
+        if not odd_paths or can_conform_to(ref):
+            log_func(f"➕ Appending {len(new_paths)} file(s) to {os.path.basename(base_path)}"
+                     + (f", re-encoding {len(odd_paths)} to match..." if odd_paths else " without re-encoding..."))
+            # Written beside the target first: the base is one of the inputs and may be the output
+            tmp_out = output_path + ".append" + os.path.splitext(output_path)[1]
+            if conform_and_join([base_path] + list(new_paths), odd_paths, ref, tmp_out, log_func, stop_event, progress_callback):
+                os.replace(tmp_out, output_path)
+                return True, output_path
+            try: os.remove(tmp_out)
+            except OSError: pass
+            if stop_event and stop_event.is_set():
+                log_func("🛑 Process stopped by user.")
+                return False, "Cancelled"
+            log_func("⚠️ Appending by stream copy failed, re-merging everything instead...")
+
+    tmp_out = output_path + ".merge" + os.path.splitext(output_path)[1]
+    ok, result = merge_videos([base_path] + list(new_paths), tmp_out, log_func, stop_event, use_gpu, progress_callback)
+    if not ok:
+        try: os.remove(tmp_out)
+        except OSError: pass
+        return ok, result
+    os.replace(tmp_out, output_path)
+    return True, output_path
+
+# Re-encoded merges pick their canvas from the inputs instead of a fixed 1080p30:
+#   "majority" - the resolution/frame rate/sample rate covering the most running time
+#   "largest"  - the biggest input, so nothing is downscaled and the output never exceeds the sources
+# An explicit `target` dict (width/height/fps/sample_rate) overrides whatever it sets.
+
+MERGE_TARGET_POLICIES = ("majority", "largest")
+DEFAULT_MERGE_TARGET = {"width": 1920, "height": 1080, "fps": 30, "sample_rate": 44100}
+
+def _weighted_mode(pairs):
+    """Value with the largest total weight from (value, weight) pairs, or None."""
+    totals = {}
+    for value, weight in pairs:
+        if value:
+            totals[value] = totals.get(value, 0.0) + weight
+    return max(totals, key=totals.get) if totals else None
+
+def merge_target_profile(infos, policy="majority", target=None):
+    """
+    Output {width, height, fps, sample_rate, upscale} for a re-encoded merge of the probed inputs.
+    "largest" never upscales: smaller clips keep their size and are padded onto the canvas.
+    """
+    infos = [info for info in infos if info is not None]
+    sizes = [(get_display_size(info), info.duration or 1.0) for info in infos]
+    # Rates stay as ffprobe's rationals so 30000/1001 is not rounded to 29.97
+    fps_values = [(_video_rate(info), info.duration or 1.0) for info in infos]
+    rates = [(info.sample_rate, info.duration or 1.0) for info in infos]
+
+    if policy == "largest":
+        size = max((s for s, _ in sizes if s), key=lambda s: s[0] * s[1], default=None)
+        fps = max((f for f, _ in fps_values if f), key=parse_frame_rate, default=None)
+        rate = max((r for r, _ in rates if r), default=None)
+    else:
+        size = _weighted_mode(sizes)
+        fps = _weighted_mode(fps_values)
+        rate = _weighted_mode(rates)
+
+    profile = dict(DEFAULT_MERGE_TARGET, upscale=(policy != "largest"))
+    if size:
+        # yuv420p needs even dimensions
+        profile["width"], profile["height"] = size[0] // 2 * 2, size[1] // 2 * 2
+    if fps:
+        profile["fps"] = fps
+    if rate:
+        profile["sample_rate"] = rate
+    if target:
+        profile.update({k: v for k, v in target.items() if v})
+    return profile
+
+def merge_encoder(use_gpu=True, log_func=print):
+    """H.264 encoder choice and settings for re-encoded merges."""
+    video_encoder = get_encoder("h264", use_gpu=use_gpu, log_func=log_func)
+    hw_init = []
+    enc_args = ["-preset", "fast"]
+    if "vaapi" in video_encoder:
+        hw_init = ["-vaapi_device", "/dev/dri/renderD128"]
+        enc_args = []
+    elif "nvenc" in video_encoder:
+        enc_args = ["-preset", "p4", "-rc", "vbr", "-cq", "23"]
+    elif "amf" in video_encoder:
+        enc_args = ["-rc", "vbr_peak", "-peak_bitrate", "5000k"]
+    else:
+        enc_args = ["-preset", "fast", "-crf", "23"]
+    return {"v_enc": video_encoder, "hw_init": hw_init, "enc_args": enc_args}
+
+def normalized_merge_cmd(video_paths, output_path, encoder, size):
+    """One ffmpeg command that scales/pads every input to `size` (a merge_target_profile) and concatenates them."""
+    w, h, fps, rate = size["width"], size["height"], size["fps"], size["sample_rate"]
+    # Without upscaling, a clip that already fits is left at its own size and only padded
+    box = f"{w}:{h}" if size.get("upscale", True) else f"'min({w},iw)':'min({h},ih)'"
     inputs = []
     filter_complex = ""
-    w, h, fps = 1920, 1080, 30
     
     for i in range(len(video_paths)):
         inputs.extend(["-i", video_paths[i]])
         filter_complex += (
-            f"[{i}:v]scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+            f"[{i}:v]scale={box}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
             f"setsar=1,fps={fps},format=yuv420p[v{i}];"
-            f"[{i}:a]aformat=sample_rates=44100:channel_layouts=stereo[a{i}];"
+            f"[{i}:a]aformat=sample_rates={rate}:channel_layouts=stereo[a{i}];"
         )
     
     for i in range(len(video_paths)):
@@ -634,71 +2572,415 @@ def merge_videos(video_paths, output_path, log_func=print, stop_event=None, use_
     
     filter_complex += f"concat=n={len(video_paths)}:v=1:a=1[outv_raw][outa]"
     
-    video_encoder = get_encoder("h264", use_gpu=use_gpu, log_func=log_func)
-    
-    hw_init = []
     final_v_map = "[outv_raw]"
-    enc_args = ["-preset", "fast"]
-    
-    if "vaapi" in video_encoder:
-        hw_init = ["-vaapi_device", "/dev/dri/renderD128"]
+    if "vaapi" in encoder["v_enc"]:
         filter_complex += f";[outv_raw]format=nv12,hwupload[outv]"
         final_v_map = "[outv]"
-        enc_args = []
-    elif "nvenc" in video_encoder:
-        enc_args = ["-preset", "p4", "-rc", "vbr", "-cq", "23"]
-    elif "amf" in video_encoder:
-        enc_args = ["-rc", "vbr_peak", "-peak_bitrate", "5000k"]
-    else:
-        enc_args = ["-preset", "fast", "-crf", "23"]
 
     cmd = ["ffmpeg", "-y", "-hide_banner"]
-    cmd.extend(hw_init)
+    cmd.extend(encoder["hw_init"])
     cmd.extend(inputs)
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", final_v_map,
         "-map", "[outa]",
-        "-c:v", video_encoder
-    ])
-    cmd.extend(enc_args)
-    cmd.extend([
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-movflags", "+faststart",
-        output_path
+        "-c:v", encoder["v_enc"]
     ])
-
+    cmd.extend(encoder["enc_args"])
+    cmd.extend(["-c:a", "aac", "-b:a", "192k"])
+    if os.path.splitext(output_path)[1].lower() in (".mp4", ".mov", ".m4v"):
+        cmd.extend(["-movflags", "+faststart"])
+    cmd.append(output_path)
+    return cmd
+
+def _run_normalized_merge(video_paths, output_path, encoder, size, log_func=print, stop_event=None, progress_callback=None):
+    cmd = normalized_merge_cmd(video_paths, output_path, encoder, size)
     log_func(f"🚀 Starting merge of {len(video_paths)} files...")
     
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            creationflags=SUBPROCESS_FLAGS
-        )
+    def on_merge_progress(prog):
+        if progress_callback:
+            progress_callback(prog)
+        log_func(f"⏳ {_format_hms(prog.secs)} @ {prog.fps:.1f} fps | Speed: {prog.speed:.2f}x", replace_last=True)
 
-        for line in process.stdout:
-            if stop_event and stop_event.is_set():
-                process.terminate()
-                log_func("🛑 Process stopped by user.")
-                return False, "Cancelled"
-
-            if "frame=" in line or "time=" in line:
-                log_func(line.strip(), replace_last=True)
-            else:
-                log_func(line.strip())
-
-        process.wait()
-        if process.returncode == 0:
+    try:
+        returncode, errors = run_ffmpeg(cmd, on_merge_progress, stop_event)
+        if stop_event and stop_event.is_set():
+            log_func("🛑 Process stopped by user.")
+            return False, "Cancelled"
+        if returncode == 0:
             return True, output_path
         else:
+            for line in errors:
+                log_func(line)
             return False, "FFmpeg process failed"
     except Exception as e:
         return False, str(e)
 
+# --- Edit Decision Lists ---
+# The ranges to remove from one source, parsed once, sorted and merged into two parallel
+# arrays so "which cut contains t" is a bisect. Shared by the trimmer (preview skipping and
+# the cut itself) and remove_silence, and saved as JSON so an edit can be replayed.
+
+EDL_VERSION = 1
+
+class EditDecisionList:
+    """Sorted, non-overlapping (start, end) ranges in seconds to cut out of `source`."""
+    def __init__(self, cuts=(), source=None):
+        merged = []
+        for start, end in sorted((float(s), float(e)) for s, e in cuts if s is not None and e is not None):
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.source = source
+        self.starts = array('d', (start for start, _ in merged))
+        self.ends = array('d', (end for _, end in merged))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def cut_at(self, t):
+        """The (start, end) cut containing `t`, or None."""
+        i = bisect.bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.starts[i], self.ends[i]
+        return None
+
+    def keep_ranges(self, duration=None, min_length=0.0):
+        """
+        The complement within [0, duration): the (start, end) ranges the output keeps.
+        Ranges no longer than `min_length` are dropped. With no duration the last end is None.
+        """
+        keep = []
+        cursor = 0.0
+        for start, end in self:
+            if start - cursor > min_length:
+                keep.append((cursor, start))
+            cursor = end
+        if duration is None:
+            keep.append((cursor, None))
+        elif duration - cursor > min_length:
+            keep.append((cursor, duration))
+        return keep
+
+    def removed_seconds(self):
+        return sum(end - start for start, end in self)
+
+    def to_dict(self):
+        return {"version": EDL_VERSION, "source": self.source, "cuts": [[start, end] for start, end in self]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([tuple(cut) for cut in data.get("cuts", [])], data.get("source"))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+# --- Cutting ---
+# Kept ranges are cut in one ffmpeg run: the concat demuxer lists the same source once per
+# range with inpoint/outpoint directives, so there are no per-segment temp files or passes.
+# A plain copy cut snaps to keyframes; smart_cut() makes it frame accurate by re-encoding
+# only the video of the partial GOP at each edge of a range and copying the whole GOPs in
+# between. Audio is stream-copied throughout, edges included.
+
+SMART_CUT_EPSILON = 0.001  # Cuts this close to a keyframe count as on it
+
+def _concat_cut(paths, ranges, output_path, total=None, log_func=print, stop_event=None, progress_callback=None):
+    """Stream-copy the concat of `paths` (each with an (inpoint, outpoint)) into `output_path`."""
+    fd, list_path = tempfile.mkstemp(prefix="cut_", suffix=".ffconcat")
+    os.close(fd)
+    try:
+        write_concat_list(paths, list_path, ranges)
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-map', '0:v:0?', '-map', '0:a?', '-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        if os.path.splitext(output_path)[1].lower() in (".mp4", ".mov", ".m4v"):
+            cmd += ['-movflags', '+faststart']
+        cmd.append(output_path)
+
+        def on_cut_progress(prog):
+            if progress_callback:
+                progress_callback(prog)
+            pct = f" ({min(100.0, prog.secs / total * 100):.0f}%)" if total else ""
+            log_func(f"⏳ {_format_hms(prog.secs)}{pct} | Speed: {prog.speed:.1f}x", replace_last=True)
+
+        returncode, errors = run_ffmpeg(cmd, on_cut_progress, stop_event)
+        if returncode is None:
+            try: os.remove(output_path)
+            except OSError: pass
+            return False, "Cancelled"
+        if returncode != 0:
+            return False, "\n".join(errors[-5:]) or f"ffmpeg exited with code {returncode}"
+        return True, output_path
+    finally:
+        try: os.remove(list_path)
+        except OSError: pass
+
+def cut_keep_ranges(input_path, keep_ranges, output_path, log_func=print, stop_event=None, progress_callback=None):
+    """
+    Stream-copy the (start, end) second ranges of `input_path` back to back into `output_path`.
+    An end of None runs to the end of the file. Returns (ok, output_path or error message).
+    """
+    if not keep_ranges:
+        return False, "Nothing to keep"
+    total = sum(end - start for start, end in keep_ranges if end is not None) or None
+    log_func(f"  Cutting {len(keep_ranges)} segment(s) in one pass...")
+    return _concat_cut([input_path] * len(keep_ranges), keep_ranges, output_path, total,
+                       log_func, stop_event, progress_callback)
+
+def plan_smart_cut(keep_ranges, keyframes, duration=None):
+    """
+    Split kept (start, end) ranges into ("copy" | "encode", start, end) pieces using a
+    KeyframeIndex. Whole GOPs
+    inside a range are copied; the partial GOP at either edge is re-encoded. An end of None
+    or at the end of the file never needs a tail re-encode (its end is None in the piece).
+    """
+    pieces = []
+    for start, end in keep_ranges:
+        if end is None or (duration and end >= duration - SMART_CUT_EPSILON):
+            end = last = None
+        else:
+            last = keyframes.before(end + SMART_CUT_EPSILON)
+        first = keyframes.after(start - SMART_CUT_EPSILON)
+
+        if first is None or (end is not None and (last is None or last <= first)):
+            # No whole GOP inside the range
+            pieces.append(("encode", start, end))
+            continue
+        if first - start > SMART_CUT_EPSILON:
+            pieces.append(("encode", start, first))
+        pieces.append(("copy", first, last))
+        if last is not None and end - last > SMART_CUT_EPSILON:
+            pieces.append(("encode", last, end))
+    return pieces
+
+def _encode_cut_piece(input_path, start, end, ref, out_path, stop_event=None):
+    """Re-encode the video of [start, end) of `input_path` to `ref`'s profile. Returns True if it matches."""
+    cmd = ['ffmpeg', '-y', '-hide_banner', '-ss', f"{start:.6f}", '-i', input_path]
+    if end is not None:
+        cmd += ['-t', f"{end - start:.6f}"]
+    # Audio is copied, not re-encoded: it maps the same streams as the copied spans, and an
+    # AAC re-encode would add encoder priming to every piece, drifting audio behind video
+    cmd += conform_args(ref, copy_audio=True) + [out_path]
+    returncode, _ = run_ffmpeg(cmd, stop_event=stop_event)
+    return returncode == 0 and concat_signature(probe(out_path)) == concat_signature(ref)
+
+def smart_cut(input_path, keep_ranges, output_path, log_func=print, stop_event=None, progress_callback=None):
+    """
+    Frame-accurate version of cut_keep_ranges(): boundary GOPs are re-encoded with the
+    source's own stream profile and spliced between stream-copied spans in one concat.
+    Falls back to the keyframe-snapped copy cut when the source can't be matched.
+    """
+    if not keep_ranges:
+        return False, "Nothing to keep"
+    ref = probe(input_path, log_func)
+    keyframes = get_keyframe_index(input_path)
+    if ref is not None and ref.intra_only:
+        # Every frame is a keyframe, a copy cut is already exact
+        return cut_keep_ranges(input_path, keep_ranges, output_path, log_func, stop_event, progress_callback)
+    if not keyframes or not can_conform_to(ref):
+        log_func("⚠️ Frame-accurate cutting isn't available for this file, cutting on keyframes instead.")
+        return cut_keep_ranges(input_path, keep_ranges, output_path, log_func, stop_event, progress_callback)
+
+    pieces = plan_smart_cut(keep_ranges, keyframes, ref.duration)
+    encode_idx = [i for i, piece in enumerate(pieces) if piece[0] == "encode"]
+    if not encode_idx:
+        return cut_keep_ranges(input_path, keep_ranges, output_path, log_func, stop_event, progress_callback)
+
+    ext = os.path.splitext(ref.path)[1].lower()
+    tmp_dir = tempfile.mkdtemp(prefix="smart_cut_")
+    try:
+        piece_paths = {i: os.path.join(tmp_dir, f"piece_{i:04d}{ext}") for i in encode_idx}
+        log_func(f"  Re-encoding {len(encode_idx)} boundary piece(s), copying the rest...")
+        workers = max(1, min(len(encode_idx), (os.cpu_count() or 1) // 4))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda i: _encode_cut_piece(input_path, pieces[i][1], pieces[i][2], ref,
+                                                                piece_paths[i], stop_event), encode_idx))
+        if stop_event and stop_event.is_set():
+            return False, "Cancelled"
+        if not all(results):
+            log_func("⚠️ Boundary pieces didn't match the source exactly, cutting on keyframes instead.")
+            return cut_keep_ranges(input_path, keep_ranges, output_path, log_func, stop_event, progress_callback)
+
+        paths, ranges = [], []
+        for i, (kind, start, end) in enumerate(pieces):
+            if kind == "copy" and end is not None:
+                # outpoint is matched against DTS. Ending at the keyframe's DTS keeps that
+                # keyframe (and the packets decoded after it) out of the copy, since the
+                # re-encoded tail starts there; the duration still spans the PTS range.
+                paths.append(input_path)
+                ranges.append((start, keyframes.dts_at(end), end - start))
+            elif kind == "copy":
+                paths.append(input_path)
+                ranges.append((start, None))
+            else:
+                paths.append(piece_paths[i])
+                ranges.append((None, None))
+        total = sum((end if end is not None else (ref.duration or start)) - start for _, start, end in pieces) or None
+        log_func(f"  Splicing {len(pieces)} piece(s)...")
+        return _concat_cut(paths, ranges, output_path, total, log_func, stop_event, progress_callback)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# --- Proxy Media ---
+# Heavy sources (4K, or HEVC/AV1/VP9 above 720p) are scrubbed through a small 540p proxy
+# with a short, B-frame-free GOP so every seek decodes only a few cheap frames. Timestamps
+# are passed through untouched, so a position in the proxy is the same position in the
+# source and cuts still run against the original. Proxies are cached by fingerprint.
+
+PROXY_HEIGHT = 540
+PROXY_GOP = 12
+PROXY_MAX_PIXELS = 1920 * 1080  # Sources up to this size play fine as they are
+PROXY_HEAVY_CODECS = {"hevc", "av1", "vp9"}
+PROXY_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+def needs_proxy(info):
+    """True if `info` is expensive enough to decode that scrubbing should use a proxy."""
+    size = get_display_size(info)
+    if size is None:
+        return False
+    w, h = size
+    if w * h > PROXY_MAX_PIXELS:
+        return True
+    return info.v_codec in PROXY_HEAVY_CODECS and min(w, h) > 720
+
+def _proxy_cache_path(input_path):
+    key = hashlib.sha1(repr(file_fingerprint(input_path)).encode()).hexdigest()
+    return get_cache_path("proxies", key + ".mp4")
+
+def cached_proxy(input_path):
+    """Path of an existing proxy for this exact file version, or None."""
+    try:
+        path = _proxy_cache_path(input_path)
+    except OSError:
+        return None
+    if os.path.exists(path):
+        touch_cache_file(path)
+        return path
+    return None
+
+def make_proxy(input_path, log_func=print, stop_event=None, progress_callback=None):
+    """Build (or reuse) the 540p playback proxy for `input_path`. Returns its path or None."""
+    out_path = cached_proxy(input_path)
+    if out_path:
+        return out_path
+    if not has_encoder("libx264"):
+        return None
+    out_path = _proxy_cache_path(input_path)
+    tmp_path = out_path + ".part.mp4"
+    # Scale the short side to PROXY_HEIGHT so portrait footage gets the same treatment
+    scale = f"scale='if(gte(iw,ih),-2,{PROXY_HEIGHT})':'if(gte(iw,ih),{PROXY_HEIGHT},-2)'"
+    cmd = ['ffmpeg', '-y', '-hide_banner', '-i', input_path, '-map', '0:v:0', '-map', '0:a:0?',
+           '-vf', scale, '-fps_mode', 'passthrough',
+           '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28', '-pix_fmt', 'yuv420p',
+           '-g', str(PROXY_GOP), '-keyint_min', str(PROXY_GOP), '-sc_threshold', '0', '-bf', '0',
+           '-c:a', 'aac', '-b:a', '96k', '-ac', '2',
+           '-sn', '-dn', '-map_metadata', '-1', '-movflags', '+faststart', tmp_path]
+
+    log_func(f"🎞️ Building a {PROXY_HEIGHT}p preview proxy for {os.path.basename(input_path)}...")
+    returncode, errors = run_ffmpeg(cmd, progress_callback, stop_event)
+    if returncode != 0:
+        if errors and not (stop_event and stop_event.is_set()):
+            log_func(f"⚠️ Proxy failed: {errors[-1]}")
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return None
+    os.replace(tmp_path, out_path)
+    prune_cache_dir(os.path.dirname(out_path), PROXY_CACHE_MAX_BYTES)
+    return out_path
+
+# --- Thumbnails ---
+# Seeks on the input side and decodes keyframes only, so a thumbnail costs one or two frame
+# decodes however long the file is. Results are cached by (fingerprint, width, time) and
+# requests run on one small shared pool; the cache is pruned whenever the queue drains.
+
+THUMB_WIDTH = 320
+THUMB_SEEK = 1.0  # Seconds in, past fade-ins and black first frames
+THUMB_WORKERS = 4
+THUMB_CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+_thumb_lock = threading.RLock()  # Re-entrant: a done-callback may run while it is held
+_thumb_pool = None
+_thumb_pending = {}
+
+def _thumbnail_cache_path(input_path, width, at):
+    key = hashlib.sha1(repr((file_fingerprint(input_path), width, at)).encode()).hexdigest()
+    return get_cache_path("thumbnails", key + ".jpg")
+
+def get_thumbnail(input_path, width=THUMB_WIDTH, at=THUMB_SEEK):
+    """JPEG thumbnail `width` px wide from the first keyframe at or after `at`. Returns its path or None."""
+    try:
+        out_path = _thumbnail_cache_path(input_path, width, at)
+    except OSError:
+        return None
+    if os.path.exists(out_path):
+        touch_cache_file(out_path)
+        return out_path
+
+    info = probe(input_path)
+    if info and info.duration and at >= info.duration:
+        at = info.duration / 2
+    tmp_path = f"{out_path}.{threading.get_ident()}.jpg"
+    # Clips with no keyframe after `at` yield nothing, so fall back to the first frame
+    for seek in dict.fromkeys((at, 0.0)):
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-skip_frame', 'nokey',
+               '-ss', f"{seek:.3f}", '-i', input_path, '-map', '0:v:0', '-frames:v', '1',
+               '-vf', f"scale={width}:-2", '-q:v', '4', tmp_path]
+        try:
+            subprocess.run(cmd, capture_output=True, creationflags=SUBPROCESS_FLAGS)
+        except OSError:
+            return None
+        if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+            os.replace(tmp_path, out_path)
+            return out_path
+    try: os.remove(tmp_path)
+    except OSError: pass
+    return None
+
+def _thumbnail_done(key):
+    with _thumb_lock:
+        _thumb_pending.pop(key, None)
+        drained = not _thumb_pending
+    if drained:
+        prune_cache_dir(os.path.join(CACHE_DIR, "thumbnails"), THUMB_CACHE_MAX_BYTES)
+
+def request_thumbnail(input_path, width=THUMB_WIDTH, at=THUMB_SEEK, callback=None):
+    """
+    Queue get_thumbnail() on the shared pool and return its Future. A request for a thumbnail
+    that is already being made shares that Future. `callback(path or None)` runs on the worker.
+    """
+    global _thumb_pool
+    key = (os.path.abspath(input_path), width, at)
+    with _thumb_lock:
+        if _thumb_pool is None:
+            _thumb_pool = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="thumb")
+        future = _thumb_pending.get(key)
+        if future is None:
+            future = _thumb_pool.submit(get_thumbnail, input_path, width, at)
+            _thumb_pending[key] = future
+            future.add_done_callback(lambda f: _thumbnail_done(key))
+    if callback:
+        future.add_done_callback(lambda f: callback(None if f.exception() else f.result()))
+    return future
+
+def request_thumbnails(paths, width=THUMB_WIDTH, callback=None):
+    """Batch form of request_thumbnail(); `callback(input_path, thumb_path)` per file as each finishes."""
+    futures = {}
+    for path in dict.fromkeys(paths):
+        cb = (lambda thumb, path=path: callback(path, thumb)) if callback else None
+        futures[path] = request_thumbnail(path, width, callback=cb)
+    return futures
+
 # --- Audio Specialized Features ---
 
 def replace_audio(video_path, audio_path, output_path, log_func=print, loop_audio=False):
@@ -799,9 +3081,10 @@ def normalize_audio(input_path, output_path, target_i=-14.0, log_func=print):
         return False, str(e)
 
 def remove_silence(input_path, output_path, db_threshold=-30, min_duration=0.5,
-                   log_func=print, stop_event=None):
+                   log_func=print, stop_event=None, frame_accurate=True):
     """
-    Removes silent parts from a video using segment-extract + concat.
+    Removes silent parts from a video with a single concat-demuxer cut
+    (smart_cut when `frame_accurate`, otherwise cut on keyframes).
     """
     try:
         total_duration = get_video_duration(input_path, log_func)
@@ -844,85 +3127,31 @@ def remove_silence(input_path, output_path, db_threshold=-30, min_duration=0.5,
         elif pending_start is not None:
             silence_periods.append((pending_start, total_duration))
 
-        silence_periods.sort(key=lambda x: x[0])
-        
-        for i, (s, e) in enumerate(silence_periods[:10]):
-            log_func(f"  Silence {i+1}: {s:.2f}s → {e:.2f}s")
-        if len(silence_periods) > 10:
-            log_func(f"  ... and {len(silence_periods)-10} more.")
+        edl = EditDecisionList(silence_periods, input_path)
 
-        keep_segments = []
-        cursor = 0.0
-        MIN_KEEP_DURATION = 0.1 
-        
-        for (s_start, s_end) in silence_periods:
-            if s_start > cursor + MIN_KEEP_DURATION:
-                keep_segments.append((cursor, s_start))
-            cursor = max(cursor, s_end)
+        for i, (s, e) in enumerate(list(edl)[:10]):
+            log_func(f"  Silence {i+1}: {s:.2f}s → {e:.2f}s")
+        if len(edl) > 10:
+            log_func(f"  ... and {len(edl)-10} more.")
 
-        if cursor < total_duration - MIN_KEEP_DURATION:
-            keep_segments.append((cursor, total_duration))
+        MIN_KEEP_DURATION = 0.1
+        keep_segments = edl.keep_ranges(total_duration, MIN_KEEP_DURATION)
 
         if not keep_segments:
             return False, "Nothing left after removing all silence — output would be empty."
 
         log_func(f"  Keeping {len(keep_segments)} segment(s) after filtering micro-fragments.")
 
-        tmp_dir = tempfile.mkdtemp(prefix="silence_cut_")
-        temp_files = []
+        cut = smart_cut if frame_accurate else cut_keep_ranges
+        ok, result = cut(input_path, keep_segments, output_path, log_func, stop_event)
+        if not ok:
+            if result == "Cancelled":
+                log_func("🛑 Cancelled.")
+                return False, result
+            return False, f"Cut failed: {result[-500:]}"
 
-        try:
-            for idx, (seg_start, seg_end) in enumerate(keep_segments):
-                if stop_event and stop_event.is_set():
-                    log_func("🛑 Cancelled.")
-                    return False, "Cancelled"
-
-                temp_out = os.path.join(tmp_dir, f"_keep_{idx:04d}.mp4")
-                temp_files.append(temp_out)
-
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-ss", f"{seg_start:.6f}",
-                    "-to", f"{seg_end:.6f}",
-                    "-i", input_path,
-                    "-c", "copy",
-                    "-avoid_negative_ts", "make_zero",
-                    temp_out
-                ]
-                log_func(f"  Extracting segment {idx + 1}/{len(keep_segments)} "
-                         f"({seg_start:.2f}s → {seg_end:.2f}s)...")
-
-                result = subprocess.run(cmd, capture_output=True, text=True,
-                                        creationflags=SUBPROCESS_FLAGS)
-                if result.returncode != 0:
-                    log_func(f"  ⚠️ Segment {idx + 1} had extraction issues.")
-
-            if len(temp_files) == 1:
-                shutil.move(temp_files[0], output_path)
-            else:
-                concat_list = os.path.join(tmp_dir, "_concat_list.txt")
-                with open(concat_list, "w") as f:
-                    for tf in temp_files:
-                        f.write(f"file '{tf}'\n")
-
-                log_func(f"  Concatenating {len(temp_files)} segment(s)...")
-                concat_cmd = [
-                    "ffmpeg", "-y",
-                    "-f", "concat", "-safe", "0",
-                    "-i", concat_list,
-                    "-c", "copy",
-                    output_path
-                ]
-                result = subprocess.run(concat_cmd, capture_output=True, text=True,
-                                        creationflags=SUBPROCESS_FLAGS)
-                if result.returncode != 0:
-                    return False, f"Concat failed: {result.stderr[-500:]}"
-
-            log_func(f"✅ Done! Saved to: {os.path.basename(output_path)}")
-            return True, output_path
-
-        finally:
-            shutil.rmtree(tmp_dir, ignore_errors=True)
+        log_func(f"✅ Done! Saved to: {os.path.basename(output_path)}")
+        return True, output_path
 
     except Exception as e:
         import traceback